@@ -36,6 +36,11 @@ class Controller:
             }
             self._send_command("DISPLAY_SELECTION", data)
         
+    def prefetch_music(self, value):
+        """选中曲目后让显示窗口提前准备曲绘"""
+        if self.display_window:
+            self.display_window.prefetch_music(value)
+
     def clear_screen(self):
         """清空屏幕，显示背景"""
         self._send_command("DISPLAY_SELECTION", {})
@@ -1,12 +1,54 @@
 import tkinter as tk
 from tkinter import ttk, font
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageTk, ImageDraw
 from utils import Utils
+from sprite_cache import SpriteCache
+from jacket_cache import JacketCache, jacket_sizes, jacket_name
+from font_cache import FontCache
+from score_renderer import ScoreRenderer
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
 import os
+import math
+import pickle
 import random
+import threading
+import time
+
+# 排版表格式版本，修改排版的计算方法时需要加一
+CARD_LAYOUT_VERSION = 1
 
 class DisplayWindow:
     """独立的图片显示窗口，负责显示图片和选曲界面"""
+
+    # 滚动时把相邻的卡片拼成长条，每帧只移动几张长条而不是每张卡片
+    SCROLLER_STRIP_TILES = False
+    # 每张长条包含的卡片数
+    STRIP_TILE_CARDS = 3
+    # 比赛结果的排版，按曲数（1920x1080下的值）：
+    # y为数字时是距离框顶部的值，('middle', 值)是距离框中线的值；
+    # track_y和track_pitch为第一首单曲成绩框相对于画面中线的y和每首之间的间距
+    # 新的曲数加一行就行，TRACK图标只有1-4
+    RESULT_LAYOUTS = {
+        2: {
+            'kop_y': 160, 'show_player': True,
+            'panel_height': 670, 'panel_y': 100 - 10, 'gray_height': 282, 'gray_y': ('middle', 185),
+            'total_icon_y': 207, 'rank_y': 173, 'total_score_y': 300, 'total_comma_y': 300 + 38,
+            'track_y': 150 + 57, 'track_pitch': 135
+        },
+        3: {
+            'kop_y': 130, 'show_player': True,
+            'panel_height': 800, 'panel_y': 100, 'gray_height': ('middle', 12), 'gray_y': ('middle', 185),
+            'total_icon_y': 207, 'rank_y': 173, 'total_score_y': ('middle', -100), 'total_comma_y': ('middle', -100 + 38),
+            'track_y': 150, 'track_pitch': 135
+        },
+        4: {
+            'kop_y': 95, 'show_player': False,
+            'panel_height': 860, 'panel_y': 80, 'gray_height': 542, 'gray_y': ('middle', 150),
+            'total_icon_y': 207 - 70, 'rank_y': 173 - 70, 'total_score_y': ('middle', -100 - 96), 'total_comma_y': ('middle', -100 + 38 - 96),
+            'track_y': 30, 'track_pitch': 133
+        }
+    }
     
     def __init__(self, controller, window_size=None):
         self.controller = controller
@@ -18,8 +60,12 @@ class DisplayWindow:
         
         # 图片缓存，防止垃圾回收
         self.image_references = []
+
+        # 选曲卡片在线程池里合成，Pillow缩放、合成、画字时会释放GIL
+        self.render_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='card_render')
         
         width, height = window_size
+        self.window_size = (width, height)
 
         # 计算缩放系数（相对于1920x1080的默认大小）
         self.scale_x = width / 1920.0
@@ -28,7 +74,24 @@ class DisplayWindow:
         self.setup_ui(window_size)
 
         self.preloaded = self.preload_images(window_size)
-        self.preloaded_fonts, self.preloaded_BPM_font, self.preloaded_team_font, self.preloaded_title_font = self.preload_fonts()
+        # 预加载图集裁剪缩放后的切图，窗口大小固定，所以目标大小也固定
+        self.sprite_cache = SpriteCache(self.preloaded.get)
+        # 比赛结果里的成绩数字，整个数字拼好后按数值缓存
+        self.score_renderer = ScoreRenderer(self.sprite_cache, Utils().resource_path("assets/picture/result_num.dds"), self._scale)
+        # 解码好的曲绘，选曲后会提前在后台解码，转码后的曲绘存在缓存目录里
+        self.jacket_cache = JacketCache(disk_dir=Utils().cache_path('jackets'))
+        # 字体第一次用到时才加载，当前分辨率会用到的字体在后台提前加载
+        self.font_cache = FontCache()
+        self.font_cache.warm_up(self.preload_fonts())
+        # 自适应字号的结果：(文字, 字体, 宽, 高, 字号, 最小字号) -> (文字, 字号)，窗口大小固定，同一首歌只需要算一次
+        self.font_fit_memo = {}
+        # 每首歌的文字排版：曲绘文件名 -> 排版记录，后台为全曲库算好并保存到缓存目录
+        self.card_layouts = {}
+        threading.Thread(target=self.load_card_layouts, daemon=True).start()
+        # 选曲界面各层：层名 -> (输入, Tkinter图片)，输入没变的层不用重新合成
+        self.selection_layers = {}
+        # 比赛结果：曲数 -> 编译好的绘制计划
+        self.result_plans = {}
 
         self._display_background('background')
         self.current_process = 0
@@ -88,19 +151,94 @@ class DisplayWindow:
         return preloaded
     
     def preload_fonts(self):
-        """预加载必要的字体资源"""
-        preloaded_fonts = {}
+        """当前分辨率会用到的字体，返回(路径, 大小)列表，交给字体缓存在后台加载"""
+        fonts = []
+        # 曲名、曲师、谱师：自适应大小在12到40之间按宽度缩放
         font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
-        if os.path.exists(font_path):
-            for size in range(3, 61):
-                preloaded_fonts[size] = ImageFont.truetype(font_path, size)
-        BPM_font_path = Utils().resource_path("assets/fonts/Helvetica Bold.ttf")
-        preloaded_BPM_font = ImageFont.truetype(BPM_font_path, self._scale_font_size(24))
-        team_font_path = Utils().resource_path("assets/fonts/SourceHanSansSC-Bold-2.otf")
-        preloaded_team_font = ImageFont.truetype(team_font_path, self._scale_font_size(42))
-        title_font_path = Utils().resource_path("assets/fonts/SourceHanSansSC-Medium-2.otf")
-        preloaded_title_font = ImageFont.truetype(title_font_path, self._scale_font_size(46))
-        return preloaded_fonts, preloaded_BPM_font,preloaded_team_font, preloaded_title_font
+        for size in range(int(40 * self.scale_x), int(12 * self.scale_x) - 1, -1):
+            fonts.append((font_path, size))
+        fonts.append((Utils().resource_path("assets/fonts/Helvetica Bold.ttf"), self._scale_font_size(24)))
+        fonts.append((Utils().resource_path("assets/fonts/SourceHanSansSC-Bold-2.otf"), self._scale_font_size(42)))
+        fonts.append((Utils().resource_path("assets/fonts/SourceHanSansSC-Medium-2.otf"), self._scale_font_size(46)))
+        # 比赛进程
+        kop_font_path = Utils().resource_path("assets/fonts/AnJingChenXingShuFanTi-2.ttf")
+        fonts.append((kop_font_path, self._scale_font_size(88)))
+        fonts.append((kop_font_path, self._scale_font_size(96)))
+        return fonts
+
+    def _build_card_layout(self, music):
+        """计算一首歌在当前分辨率下的文字排版：卡片和选曲界面的曲名、曲师、谱师、BPM，以及比赛结果里的曲名"""
+        font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
+        text_max_width = self._scale(560, 'x')
+        nd_max_width = self._scale(278, 'x')
+        _nd_font_size = 16
+        result_text_max_width = self._scale(580, 'x')
+        result_text_font_size = 23
+
+        layout = {
+            'name': self.get_adaptive_font_size(music['Name'], font_path, text_max_width, 56, initial_size=40, min_size=30),
+            'composer': self.get_adaptive_font_size(music['Composer'], font_path, text_max_width, 44, initial_size=20, min_size=15),
+            'result_name': self.get_adaptive_font_size(music['Name'], font_path, result_text_max_width, 56, initial_size=result_text_font_size, min_size=result_text_font_size)
+        }
+        # BPM表里没有的曲目没有谱师和BPM
+        if 'ND' in music:
+            layout['nd'] = self.get_adaptive_font_size(music['ND'], font_path, nd_max_width, 24, initial_size=_nd_font_size, min_size=_nd_font_size)
+        if 'BPM' in music:
+            layout['bpm'] = str(round(float(music['BPM'])))
+        return layout
+
+    def card_layout(self, music):
+        """一首歌的排版记录，排版表里还没有时当场计算"""
+        key = jacket_name(music['Jacket'])
+        layout = self.card_layouts.get(key)
+        if layout is None:
+            layout = self._build_card_layout(music)
+            self.card_layouts[key] = layout
+        return layout
+
+    def _card_layout_signature(self):
+        """排版表的签名：格式版本、窗口大小、曲库签名、字体文件"""
+        font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
+        stat = os.stat(font_path)
+        return (CARD_LAYOUT_VERSION, self.window_size, Utils().music_data_signature, (stat.st_mtime_ns, stat.st_size))
+
+    def load_card_layouts(self):
+        """后台线程：读取保存的排版表，没有或者过期时为全曲库重新计算并保存"""
+        width, height = self.window_size
+        cache_path = Utils().cache_path(f'card_layout_{width}x{height}.pickle')
+        try:
+            signature = self._card_layout_signature()
+        except OSError as e:
+            print(f"排版表生成失败: {e}")
+            return
+
+        layouts = None
+        try:
+            with open(cache_path, 'rb') as file:
+                cache = pickle.load(file)
+            if isinstance(cache, dict) and cache.get('signature') == signature:
+                layouts = cache.get('layouts')
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            pass
+
+        if layouts is None:
+            layouts = {}
+            for music in Utils().music_list.values():
+                try:
+                    layouts[jacket_name(music['Jacket'])] = self._build_card_layout(music)
+                except Exception as e:
+                    print(f"排版失败 {music.get('Name')}: {e}")
+            try:
+                os.makedirs(Utils().get_cache_dir(), exist_ok=True)
+                with open(cache_path + '.tmp', 'wb') as file:
+                    pickle.dump({'signature': signature, 'layouts': layouts}, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(cache_path + '.tmp', cache_path)
+            except OSError as e:
+                print(f"排版表保存失败: {e}")
+
+        # 主线程在这期间当场算好的记录也留下
+        layouts.update(self.card_layouts)
+        self.card_layouts = layouts
 
     def setup_ui(self, window_size=None):
         """设置用户界面"""
@@ -139,6 +277,25 @@ class DisplayWindow:
         except Exception as e:
             print(f"显示选曲错误: {e}")
 
+    def prefetch_music(self, value):
+        """在后台解码选中曲目的曲绘，value为下拉框里的“ID - 曲名”"""
+        if not value:
+            return
+        music = Utils().music_list.get(value.split()[0])
+        if not music:
+            return
+        try:
+            self.render_pool.submit(self._prefetch_jacket, music['Jacket'])
+        except RuntimeError:
+            # 窗口正在关闭，线程池已经停止
+            pass
+
+    def _prefetch_jacket(self, path):
+        try:
+            self.jacket_cache.load(path, jacket_sizes(self.window_size))
+        except Exception as e:
+            print(f"曲绘预读失败: {e}")
+
     def random_music(self, data):
         min_const, max_const = 0.0, 16.0
         try:
@@ -152,18 +309,16 @@ class DisplayWindow:
         if min_const > max_const:
             min_const, max_const = max_const, min_const
 
-        if data['library'] == '全曲库':
-            unfiltered_music = Utils().music_list
-        else:
-            unfiltered_music = Utils().users_music_list.get(data['library'], '全曲库')
-        filtered_music = filtered_music = [music for music in unfiltered_music.values() if music.get('Const', 0.0) >= min_const and music.get('Const', 16.0) <= max_const]
-        if filtered_music == []:
+        # 全曲库或找不到的曲库都用全曲库的索引
+        filtered_music, start, end = Utils().get_const_range(data['library'], min_const, max_const)
+        if start >= end:
             filtered_music = list(Utils().music_list.values())
+            start, end = 0, len(filtered_music)
 
         random_music_number = 30 + random.randint(-5, 5)
         random_music_list = []
         for index in range(random_music_number):
-            music = random.choice(filtered_music)
+            music = filtered_music[random.randrange(start, end)]
             random_music_list.append(music)
         #print(random_music_list)
         self.scroller(random_music_number, random_music_list)
@@ -208,326 +363,252 @@ class DisplayWindow:
         frame_width = self._scale(424, 'x')
         frame_height = self._scale(510, 'y')
         frame_time = image_time
-        frame_path = Utils().resource_path("assets/picture/frame.png")
-
-        #曲绘图片大小
-        jacket_width = self._scale(300, 'x')
-        jacket_height = self._scale(300, 'y')
-        jacket_time = image_time
-        jacket_dy_position = self._scale(100, 'y')
-
-        text_max_width = self._scale(560, 'x')
-        nd_max_width = self._scale(278, 'x')
-
-        title_y_position = self._scale(834, 'y')
-
-        #两侧的等级框
-        level_image_path = Utils().resource_path("assets/picture/levels.dds")
-        level_left = 4
-        level_top = 1
-        level_right = 79
-        level_bottom = 85
-        level_width = self._scale(level_right - level_left, 'x')
-        level_height = self._scale(level_bottom - level_top, 'y')
-        level_time = image_time
-        level_dx_position = self._scale(223, 'x')
-        level_dy_position = self._scale(160, 'y')
-
-        level_number_path = level_image_path
-        level_number_top = 142
-        level_number_bottom = 177
-        level_number_left = [
-            12, 54, 92, 132, 171, 212, 252, 293, 331, 371
-        ]
-        level_number_right = [
-            36, 69, 117, 157, 197, 237, 276, 316, 356, 540
-        ]
-        level_plus_top = 140
-        level_plus_bottom = 154
-        level_plus_left = 411
-        level_plus_right = 424
-        level_plus_width = self._scale(level_plus_right - level_plus_left, 'x')
-        level_plus_height = self._scale(level_plus_bottom - level_plus_top, 'y')
-        level_number_height = self._scale(level_number_bottom - level_number_top, 'y')
-        level_number_time = level_time
-
-        level_number_dy_position = self._scale(178, 'y')
-
-        title_dy_position = self._scale(240, 'y')
-        composer_dy_position = self._scale(288, 'y')
-
-        BPM_dx_position = self._scale(256, 'x')
-        BPM_dy_position = self._scale(328, 'y')
-        BPM_font_size = self._scale_font_size(24)
-
-        nd_top = 114
-        nd_left = 193
-        nd_right = 311
-        nd_bottom = 124
-
-        nd_width = self._scale(nd_right - nd_left, 'x')
-        nd_height = self._scale(nd_bottom - nd_top, 'y')
-
-        nd_dx_position = self._scale(-191, 'x')
-        nd_dy_position = self._scale(328, 'y')
-        nd_name_dx_position = self._scale(-102, 'x')
-        _nd_font_size = 16
 
-        font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
-        BPM_font_path = Utils().resource_path("assets/fonts/Helvetica Bold.ttf")
+        card_y_position = canvas_height // 2 + self._scale(50, 'y')
+        # 淡出的两张卡片需要保留PIL图像
+        fade_indexes = (random_music_number - 1, random_music_number - 3)
 
         index = 0
         music_list_information = []
         for music in random_music_list:
-            music_list_information.append({})
+            music_list_information.append({'box': None, 'tk_box': None, 'img': None})
             music_list_information[index]['x_position'] = canvas_width // 2 + self._scale(800 * index, 'x')
+            index += 1
 
-            if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
-                music_name, title_font_size = self.get_adaptive_font_size(music['Name'], font_path, text_max_width, 56, initial_size=40, min_size=30)
-                composer_name, composer_font_size = self.get_adaptive_font_size(music['Composer'], font_path, text_max_width, 44, initial_size=20, min_size=15)
-                nd_name, nd_font_size = self.get_adaptive_font_size(music['ND'], font_path, nd_max_width, 24, initial_size=_nd_font_size, min_size=_nd_font_size)
-
-                crop_region = (level_left, level_top, level_right, level_bottom)
-                img_overlay_list=[
-                    {
-                        'path': music['Jacket'],
-                        'position': (
-                            int(frame_width*frame_time) // 2,
-                            int(frame_height*frame_time) // 2 - jacket_dy_position
-                        ),
-                        'size': (int(jacket_width*jacket_time), int(jacket_height*jacket_time)),
-                        'alpha': 1.0,
-                        'crop': None
-                    },
-                    {
-                        'path': level_image_path,
-                        'position': (
-                            int(frame_width*frame_time) // 2 - level_dx_position,
-                            int(frame_height*frame_time) // 2 + level_dy_position
-                        ),
-                        'size': (int(level_width*level_time), int(level_height*level_time)),
-                        'alpha': 1.0,
-                        'crop': crop_region
-                    },
-                    {
-                        'path': level_image_path,
-                        'position': (
-                            int(frame_width*frame_time) // 2 + nd_dx_position,
-                            int(frame_height*frame_time) // 2 + nd_dy_position
-                        ),
-                        'size': (int(nd_width*level_time), int(nd_height*level_time)),
-                        'alpha': 1.0,
-                        'crop': (nd_left, nd_top, nd_right, nd_bottom)
-                    }
-                ]
+        # 工作线程合成好的卡片：(序号, PIL图像)，PhotoImage只在Tk线程创建
+        ready_cards = Queue()
 
-                # 等级
-                level = music['Const']
-                if level < 10:
-                    pass # 应该不会打小于10级的歌吧，我是懒狗不做了
-                elif level < 100:
-                    number1 = int(level) // 10
-                    number2 = int(level) % 10
-                    decimal = level - int(level)
-                    crop_region = (level_number_left[number1], level_number_top, level_number_right[number1], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number1] - level_number_left[number1], 'x')
-                    img_overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                int(frame_width * frame_time) // 2 - level_dx_position + self._scale(- 2 - 20, 'x'),
-                                int(frame_height * frame_time) // 2 + level_number_dy_position
-                            ),
-                            'size': (int(level_number_width*level_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    crop_region = (level_number_left[number2], level_number_top, level_number_right[number2], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number2] - level_number_left[number2], 'x')
-                    img_overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                int(frame_width * frame_time) // 2 - level_dx_position + self._scale(- 2 + 20, 'x'),
-                                int(frame_height * frame_time) // 2 + level_number_dy_position
-                            ),
-                            'size': (int(level_number_width*level_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    if decimal >= 0.5:
-                        crop_region = (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
-                        img_overlay_list.append(
-                            {
-                                'path': level_number_path,
-                                'position': (
-                                    int(frame_width * frame_time) // 2 - level_dx_position + self._scale(40, 'x'),
-                                    int(frame_height * frame_time) // 2 + level_number_dy_position - self._scale(30, 'y')
-                                ),
-                                'size': (int(level_plus_width*level_time), int(level_plus_height*level_number_time)),
-                                'alpha': 1.0,
-                                'crop': crop_region
-                            }
-                        )
+        def render_card(index):
+            """工作线程：合成第index张卡片放进队列"""
+            if self.current_process != process:
+                return
+            try:
+                img = self._compose_music_card(random_music_list[index])
+            except Exception as e:
+                print(f"卡片合成失败: {e}")
+                img = None
+            ready_cards.put((index, img))
+
+        def store_card(index, img):
+            information = music_list_information[index]
+            if information['tk_box'] is None and img is not None:
+                information['tk_box'] = ImageTk.PhotoImage(img)
+                if index in fade_indexes:
+                    information['img'] = img
+                self.image_references.append(information['tk_box'])
+
+        def receive_cards():
+            """Tk线程：取出所有已经合成好的卡片"""
+            while True:
+                try:
+                    index, img = ready_cards.get_nowait()
+                except Empty:
+                    return
+                store_card(index, img)
+
+        def prerender_card(index):
+            """返回第index张卡片，后台还没合成好时直接在Tk线程合成"""
+            receive_cards()
+            if music_list_information[index]['tk_box'] is None:
+                store_card(index, self._compose_music_card(random_music_list[index]))
+            return music_list_information[index]['tk_box']
+
+        # 长条模式：卡片按顺序每STRIP_TILE_CARDS张拼成一张透明底的长条
+        strip_mode = self.SCROLLER_STRIP_TILES
+        card_width = int(frame_width * frame_time)
+        card_height = int(frame_height * frame_time)
+        # 滚动过的距离，卡片和长条的位置都由它算出
+        moved_distance = 0
+
+        tile_information = []
+        for first in range(0, random_music_number, self.STRIP_TILE_CARDS):
+            indexes = range(first, min(first + self.STRIP_TILE_CARDS, random_music_number))
+            first_x = music_list_information[first]['x_position']
+            card_offsets = [music_list_information[index]['x_position'] - first_x for index in indexes]
+            tile_information.append({
+                'indexes': indexes,
+                'card_offsets': card_offsets,  # 每张卡片左边缘相对长条左边缘的位置
+                'left': first_x - card_width // 2,
+                'width': card_offsets[-1] + card_width,
+                'img': None,
+                'tk_tile': None,
+                'item': None,
+                'retired': False  # 已经移出画面或者合成失败
+            })
+        ready_tiles = Queue()
+
+        def compose_tile(tile):
+            """合成第tile张长条，返回PIL图像，可以在工作线程里调用"""
+            information = tile_information[tile]
+            img = Image.new('RGBA', (information['width'], card_height), (0, 0, 0, 0))
+            for index, offset in zip(information['indexes'], information['card_offsets']):
+                img.paste(self._compose_music_card(random_music_list[index]), (offset, 0))
+            return img
+
+        def render_tile(tile):
+            """工作线程：合成第tile张长条放进队列"""
+            if self.current_process != process:
+                return
+            try:
+                img = compose_tile(tile)
+            except Exception as e:
+                print(f"长条合成失败: {e}")
+                img = None
+            ready_tiles.put((tile, img))
+
+        def store_tile(tile, img):
+            information = tile_information[tile]
+            if information['img'] is None and not information['retired']:
+                if img is None:
+                    information['retired'] = True
                 else:
-                    pass
-                tk_box = self.overlay_image(
-                    base_image_path=frame_path,
-                    img_overlay_list=img_overlay_list,
-                    text_overlay_list=[
-                        {
-                            'text': music_name,
-                            'position': (
-                                int(frame_width*frame_time) // 2,
-                                int(frame_height*frame_time) // 2 + title_dy_position
-                            ),
-                            'font_size': title_font_size,
-                        },
-                        {
-                            'text': composer_name,
-                            'position': (
-                                int(frame_width*frame_time) // 2,
-                                int(frame_height*frame_time) // 2 + composer_dy_position
-                            ),
-                            'font_size': composer_font_size,
-                        },
-                        {
-                            'text': str(round(float(music['BPM']))),
-                            'position': (
-                                int(frame_width*frame_time) // 2 + BPM_dx_position,
-                                int(frame_height*frame_time) // 2 + BPM_dy_position
-                            ),
-                            'font_size': BPM_font_size,
-                            'font_path': BPM_font_path
-                        },
-                        {
-                            'text': nd_name,
-                            'position': (
-                                int(frame_width*frame_time) // 2 + nd_name_dx_position,
-                                int(frame_height*frame_time) // 2 + nd_dy_position
-                            ),
-                            'font_size': nd_font_size,
-                            'font_path': font_path,
-                            'anchor': 'lm'
-                        }
-                    ],
-                    target_size=(int(frame_width*frame_time), int(frame_height*frame_time))
-                )
-                music_list_information[index]['box'] = self.canvas.create_image(
-                    music_list_information[index]['x_position'],
-                    canvas_height // 2 + self._scale(50, 'y'),
-                    image=tk_box,
-                    anchor=tk.CENTER
+                    information['img'] = img
+
+        def receive_tiles():
+            """Tk线程：取出所有已经合成好的长条"""
+            while True:
+                try:
+                    tile, img = ready_tiles.get_nowait()
+                except Empty:
+                    return
+                store_tile(tile, img)
+
+        def prepare_tile(tile):
+            """长条快进入画面时才创建PhotoImage，移出画面就释放，同时只保留几张"""
+            receive_tiles()
+            information = tile_information[tile]
+            if information['img'] is None and not information['retired']:
+                try:
+                    store_tile(tile, compose_tile(tile))
+                except Exception as e:
+                    print(f"长条合成失败: {e}")
+                    store_tile(tile, None)
+            if information['tk_tile'] is None and information['img'] is not None:
+                information['tk_tile'] = ImageTk.PhotoImage(information['img'])
+            return information['tk_tile']
+
+        def show_tile(tile):
+            """在画布上显示第tile张长条"""
+            tk_tile = prepare_tile(tile)
+            if tk_tile:
+                tile_information[tile]['item'] = self.canvas.create_image(
+                    tile_information[tile]['left'] - moved_distance,
+                    card_y_position,
+                    image=tk_tile,
+                    anchor=tk.W
                 )
-                self.image_references.append(tk_box)
-                
-            else:
-                music_list_information[index]['box'] = None
 
-            index += 1
+        def move_tiles():
+            """每帧只移动画面里的长条"""
+            for tile, information in enumerate(tile_information):
+                if information['retired']:
+                    continue
+                left = information['left'] - moved_distance
+                if information['item']:
+                    self.canvas.coords(information['item'], left, card_y_position)
+                    if left + information['width'] < 0:
+                        self.canvas.delete(information['item'])
+                        information.update(item=None, tk_tile=None, img=None, retired=True)
+                elif left <= canvas_width:
+                    show_tile(tile)
+                elif left <= canvas_width * 2:
+                    # 提前一屏准备好PhotoImage
+                    prepare_tile(tile)
+                else:
+                    break
 
-            """
-            #边框
-            if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
-                tk_frame = self._load_image(frame_path, frame_width*frame_time, frame_height*frame_time)
-                music_list_information[index]['frame'] = self.canvas.create_image(
-                    music_list_information[index]['x_position'],
-                    canvas_height // 2 + 50,
-                    image=tk_frame,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_frame)
-            else:
-                music_list_information[index]['box'] = None
-
-            #曲名
-            if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
-                text = music['Name']
-                text, font_size = self._get_adaptive_font_size(text, "SEGA_MaruGothic-DB", 582, 56, initial_size=30, min_size=20)
-                music_list_information[index]['title'] = self.canvas.create_text(
-                    music_list_information[index]['x_position'],
-                    title_y_position,
-                    text=text,
-                    font=("SEGA_MaruGothic-DB", font_size),
-                    fill="black",
-                    anchor=tk.CENTER
-                )
-            else:
-                music_list_information[index]['title'] = None
-
-            #曲师
-            if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
-                text = music['Composer']
-                text, font_size = self._get_adaptive_font_size(text, "SEGA_MaruGothic-DB", 582, 56, initial_size=16, min_size=12)
-                music_list_information[index]['composer'] = self.canvas.create_text(
-                    music_list_information[index]['x_position'],
-                    title_y_position + 44,
-                    text=text,
-                    font=("SEGA_MaruGothic-DB", font_size),
-                    fill="black",
-                    anchor=tk.CENTER
-                )
-            else:
-                music_list_information[index]['composer'] = None
-
-            #曲绘
-            if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
-                tk_jacket = self._load_image(music['Jacket'], jacket_width*jacket_time, jacket_height*jacket_time)
-                music_list_information[index]['jacket'] = self.canvas.create_image(
-                    music_list_information[index]['x_position'],
-                    jacket_y_position,
-                    image=tk_jacket,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_jacket)
-            else:
-                music_list_information[index]['jacket'] = None
-
-            #等级框
-            if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
-                tk_level = self._load_image(level_image_path, level_width*level_time, level_height*level_time, crop=crop_region)
-                music_list_information[index]['level'] = self.canvas.create_image(
-                    music_list_information[index]['x_position'] - level_dx_position,
-                    level_y_position,
-                    image=tk_level,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_level)
+        def swap_tiles_for_cards():
+            """停下后把长条换回单张卡片，淡出时要单独处理卡片"""
+            for information in tile_information:
+                if not information['item']:
+                    continue
+                for index, offset in zip(information['indexes'], information['card_offsets']):
+                    music_list_information[index]['x_position'] -= moved_distance
+                    x_position = music_list_information[index]['x_position']
+                    if x_position - frame_width * frame_time // 2 <= canvas_width and x_position + frame_width * frame_time // 2 >= 0:
+                        # 直接从长条里裁出来，和单独合成的卡片完全一样
+                        store_card(index, information['img'].crop((offset, 0, offset + card_width, card_height)))
+                        show_card(index)
+                self.canvas.delete(information['item'])
+                information.update(item=None, tk_tile=None, img=None, retired=True)
+
+        # 越靠右边的卡片越早出现，按序号从小到大提交
+        futures = []
+        try:
+            if strip_mode:
+                for tile in range(len(tile_information)):
+                    futures.append(self.render_pool.submit(render_tile, tile))
             else:
-                music_list_information[index]['level'] = None
-            """
+                for index in range(random_music_number):
+                    futures.append(self.render_pool.submit(render_card, index))
+        except RuntimeError:
+            # 窗口正在关闭，线程池已经停止
+            pass
+
+        def cancel_rendering():
+            for future in futures:
+                future.cancel()
 
+        def show_card(index):
+            """在画布上显示第index张卡片"""
+            music_list_information[index]['box'] = self.canvas.create_image(
+                music_list_information[index]['x_position'],
+                card_y_position,
+                image=prerender_card(index),
+                anchor=tk.CENTER
+            )
+
+        # 一开始就能看到的卡片等合成好立即显示
+        if strip_mode:
+            for tile in range(len(tile_information)):
+                if tile_information[tile]['left'] <= canvas_width:
+                    if tile < len(futures):
+                        futures[tile].result()
+                    show_tile(tile)
+        else:
+            for index in range(random_music_number):
+                if music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width:
+                    if index < len(futures):
+                        futures[index].result()
+                    show_card(index)
+
+        # 动画按时间推进，某一帧来晚了就直接跳到该在的位置，不会拖慢整个动画
+        frame_interval = 0.03
+
+        def next_frame_delay(start):
+            """到下一个frame_interval整数倍时刻的毫秒数"""
+            elapsed = time.monotonic() - start
+            next_frame = (math.floor(elapsed / frame_interval) + 1) * frame_interval
+            return max(1, round((next_frame - elapsed) * 1000))
+
+        fade_duration = 0.6
         def fade_out():
             index_range = [random_music_number-1, random_music_number-3]
-            alpha = 1.0
+            fade_start = time.monotonic()
+            # 淡出的卡片只拆一次通道，每帧只重新计算alpha通道
+            fade_bands = {}
+            for index in index_range:
+                if music_list_information[index]['box'] and music_list_information[index]['img'] is not None:
+                    fade_bands[index] = music_list_information[index]['img'].convert('RGBA').split()
             def step():
                 if self.current_process != process:
                     return
 
-                nonlocal alpha
-                alpha -= 0.05
-                for index in index_range:
-                    if alpha <= 0:
+                alpha = 1.0 - (time.monotonic() - fade_start) / fade_duration
+                if alpha <= 0:
+                    for index in index_range:
                         if music_list_information[index]['box']:
                             self.canvas.delete(music_list_information[index]['box'])
-                        return
-                    
-                    if music_list_information[index]['box']:
-                        # 获取原始PIL图像
-                        original_img = music_list_information[index]['img']
-                        
+                            music_list_information[index]['box'] = None
+                    return
+                for index in index_range:
+                    if music_list_information[index]['box'] and index in fade_bands:
                         # 创建带透明度的新图像（这就是操作final_img）
-                        faded_img = self._create_faded_image(original_img, alpha)
+                        faded_img = self._create_faded_image(music_list_information[index]['img'], alpha, fade_bands[index])
                         
-                        # 转换为PhotoImage
-                        new_tk = ImageTk.PhotoImage(faded_img)
-                        
-                        # 更新canvas上的图像
-                        self.canvas.itemconfig(music_list_information[index]['box'], image=new_tk)
-                        self.image_references.append(new_tk)
-                self.root.after(30, step)
+                        # 直接写进卡片原来的PhotoImage，画布上的图片会跟着更新，不用每帧新建PhotoImage
+                        music_list_information[index]['tk_box'].paste(faded_img)
+                self.root.after(next_frame_delay(fade_start), step)
             step()
             return
             index_range = [random_music_number-1, random_music_number-3]
@@ -581,324 +662,298 @@ class DisplayWindow:
                 self.root.after(30, step)
             step()
 
-        max_speed = 70.0
-        speed = 0.0
-        acceleration = 0.5
-        deceleration = 0.7
-        total_distance = self._scale((random_music_number - 2) * 800, 'x')
+        # 梯形速度曲线：加速、匀速、减速，参数按1920宽度时每帧0.5、70、0.7像素换算成每秒
+        max_speed = 70.0 * self.scale_x / frame_interval
+        acceleration = 0.5 * self.scale_x / frame_interval ** 2
+        deceleration = 0.7 * self.scale_x / frame_interval ** 2
+        total_distance = max(0, self._scale((random_music_number - 2) * 800, 'x'))
+
+        if max_speed ** 2 / acceleration / 2 + max_speed ** 2 / deceleration / 2 > total_distance:
+            # 距离太短，达不到最高速度
+            peak_speed = math.sqrt(2 * total_distance * acceleration * deceleration / (acceleration + deceleration))
+            cruise_time = 0.0
+        else:
+            peak_speed = max_speed
+            cruise_time = (total_distance - max_speed ** 2 / acceleration / 2 - max_speed ** 2 / deceleration / 2) / max_speed
+        accelerate_time = peak_speed / acceleration
+        decelerate_time = peak_speed / deceleration
+        spin_duration = accelerate_time + cruise_time + decelerate_time
+
+        def distance_at(t):
+            """开始滚动t秒后走过的距离"""
+            if t >= spin_duration:
+                return total_distance
+            if t < accelerate_time:
+                return acceleration * t * t / 2
+            distance = acceleration * accelerate_time ** 2 / 2
+            t -= accelerate_time
+            if t < cruise_time:
+                return distance + peak_speed * t
+            distance += peak_speed * cruise_time
+            t -= cruise_time
+            return distance + peak_speed * t - deceleration * t * t / 2
+
+        spin_start = None
 
         def move():
             if self.current_process != process:
+                cancel_rendering()
                 return
 
-            nonlocal speed, total_distance
-            if total_distance <= 0:
-                self.root.after(700, fade_out)
-                return
-            elif total_distance < speed * speed / deceleration / 2 + 20 and speed > 1+ deceleration:
-                speed -= deceleration
-            elif speed < max_speed:
-                speed += acceleration
-            total_distance -= int(speed)
-            index = 0
-            for music in random_music_list:
-                music_list_information[index]['x_position'] -= int(speed)
-
-                if music_list_information[index]['box']:
-                    self.canvas.coords(music_list_information[index]['box'], music_list_information[index]['x_position'], canvas_height // 2 + self._scale(50, 'y'))
-                    if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
-                        self.canvas.delete(music_list_information[index]['box'])
-                        music_list_information[index]['box'] = None
-                elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
-                      music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
-                    # 实时生成box
-                    music_name, title_font_size = self.get_adaptive_font_size(music['Name'], font_path, text_max_width, 56, initial_size=40, min_size=30)
-                    composer_name, composer_font_size = self.get_adaptive_font_size(music['Composer'], font_path, text_max_width, 44, initial_size=20, min_size=15)
-                    nd_name, nd_font_size = self.get_adaptive_font_size(music['ND'], font_path, nd_max_width, 24, initial_size=_nd_font_size, min_size=_nd_font_size)
-
-                    crop_region = (level_left, level_top, level_right, level_bottom)
-                    img_overlay_list=[
-                        {
-                            'path': music['Jacket'],
-                            'position': (
-                                int(frame_width*frame_time) // 2,
-                                int(frame_height*frame_time) // 2 - jacket_dy_position
-                            ),
-                            'size': (int(jacket_width*jacket_time), int(jacket_height*jacket_time)),
-                            'alpha': 1.0,
-                            'crop': None
-                        },
-                        {
-                            'path': level_image_path,
-                            'position': (
-                                int(frame_width*frame_time) // 2 - level_dx_position,
-                                int(frame_height*frame_time) // 2 + level_dy_position
-                            ),
-                            'size': (int(level_width*level_time), int(level_height*level_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        },
-                        {
-                            'path': level_image_path,
-                            'position': (
-                                int(frame_width*frame_time) // 2 + nd_dx_position,
-                                int(frame_height*frame_time) // 2 + nd_dy_position
-                            ),
-                            'size': (int(nd_width*level_time), int(nd_height*level_time)),
-                            'alpha': 1.0,
-                            'crop': (nd_left, nd_top, nd_right, nd_bottom)
-                        }
-                    ]
-
-                    # 等级
-                    level = music['Const']
-                    if level < 10:
-                        pass # 应该不会打小于10级的歌吧，我是懒狗不做了
-                    elif level < 100:
-                        number1 = int(level) // 10
-                        number2 = int(level) % 10
-                        decimal = level - int(level)
-                        crop_region = (level_number_left[number1], level_number_top, level_number_right[number1], level_number_bottom)
-                        level_number_width = self._scale(level_number_right[number1] - level_number_left[number1], 'x')
-                        img_overlay_list.append(
-                            {
-                                'path': level_number_path,
-                                'position': (
-                                    int(frame_width * frame_time) // 2 - level_dx_position + self._scale(- 2 - 20, 'x'),
-                                    int(frame_height * frame_time) // 2 + level_number_dy_position
-                                ),
-                                'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                                'alpha': 1.0,
-                                'crop': crop_region
-                            }
-                        )
-                        crop_region = (level_number_left[number2], level_number_top, level_number_right[number2], level_number_bottom)
-                        level_number_width = self._scale(level_number_right[number2] - level_number_left[number2], 'x')
-                        img_overlay_list.append(
-                            {
-                                'path': level_number_path,
-                                'position': (
-                                    int(frame_width * frame_time) // 2 - level_dx_position + self._scale(- 2 + 20, 'x'),
-                                    int(frame_height * frame_time) // 2 + level_number_dy_position
-                                ),
-                                'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                                'alpha': 1.0,
-                                'crop': crop_region
-                            }
-                        )
-                        if decimal >= 0.5:
-                            crop_region = (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
-                            img_overlay_list.append(
-                                {
-                                    'path': level_number_path,
-                                    'position': (
-                                        int(frame_width * frame_time) // 2 - level_dx_position + self._scale(40, 'x'),
-                                        int(frame_height * frame_time) // 2 + level_number_dy_position - self._scale(30, 'y')
-                                    ),
-                                    'size': (int(level_plus_width*level_number_time), int(level_plus_height*level_number_time)),
-                                    'alpha': 1.0,
-                                    'crop': crop_region
-                                }
-                            )
-                    else:
-                        pass
-
-                    if index == random_music_number - 1 or index == random_music_number - 3:
-                        tk_box, music_list_information[index]['img'] = self.overlay_image(
-                            base_image_path=frame_path,
-                            img_overlay_list=img_overlay_list,
-                            text_overlay_list=[
-                                {
-                                    'text': music_name,
-                                    'position': (
-                                        int(frame_width*frame_time) // 2,
-                                        int(frame_height*frame_time) // 2 + title_dy_position
-                                    ),
-                                    'font_size': title_font_size,
-                                },
-                                {
-                                    'text': composer_name,
-                                    'position': (
-                                        int(frame_width*frame_time) // 2,
-                                        int(frame_height*frame_time) // 2 + composer_dy_position
-                                    ),
-                                    'font_size': composer_font_size,
-                                },
-                                {
-                                    'text': str(round(float(music['BPM']))),
-                                    'position': (
-                                        int(frame_width*frame_time) // 2 + BPM_dx_position,
-                                        int(frame_height*frame_time) // 2 + BPM_dy_position
-                                    ),
-                                    'font_size': BPM_font_size,
-                                    'font_path': BPM_font_path
-                                },
-                                {
-                                    'text': nd_name,
-                                    'position': (
-                                        int(frame_width*frame_time) // 2 + nd_name_dx_position,
-                                        int(frame_height*frame_time) // 2 + nd_dy_position
-                                    ),
-                                    'font_size': nd_font_size,
-                                    'font_path': font_path,
-                                    'anchor': 'lm'
-                                }
-                            ],
-                            target_size=(int(frame_width*frame_time), int(frame_height*frame_time)),
-                            output_img=True
-                        )
-                    else:
-                        tk_box = self.overlay_image(
-                            base_image_path=frame_path,
-                            img_overlay_list=img_overlay_list,
-                            text_overlay_list=[
-                                {
-                                    'text': music_name,
-                                    'position': (
-                                        int(frame_width*frame_time) // 2,
-                                        int(frame_height*frame_time) // 2 + title_dy_position
-                                    ),
-                                    'font_size': title_font_size,
-                                },
-                                {
-                                    'text': composer_name,
-                                    'position': (
-                                        int(frame_width*frame_time) // 2,
-                                        int(frame_height*frame_time) // 2 + composer_dy_position
-                                    ),
-                                    'font_size': composer_font_size,
-                                },
-                                {
-                                    'text': str(round(float(music['BPM']))),
-                                    'position': (
-                                        int(frame_width*frame_time) // 2 + BPM_dx_position,
-                                        int(frame_height*frame_time) // 2 + BPM_dy_position
-                                    ),
-                                    'font_size': BPM_font_size,
-                                    'font_path': BPM_font_path
-                                },
-                                {
-                                    'text': nd_name,
-                                    'position': (
-                                        int(frame_width*frame_time) // 2 + nd_name_dx_position,
-                                        int(frame_height*frame_time) // 2 + nd_dy_position
-                                    ),
-                                    'font_size': nd_font_size,
-                                    'font_path': font_path,
-                                    'anchor': 'lm'
-                                }
-                            ],
-                            target_size=(int(frame_width*frame_time), int(frame_height*frame_time))
-                        )
-                    music_list_information[index]['box'] = self.canvas.create_image(
-                        music_list_information[index]['x_position'],
-                        canvas_height // 2 + self._scale(50, 'y'),
-                        image=tk_box,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_box)
-
-                index += 1
-
-                continue
-                #边框
-                if music_list_information[index]['frame']:
-                    self.canvas.coords(music_list_information[index]['frame'], music_list_information[index]['x_position'], canvas_height // 2 + 50)
-                    if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
-                        self.canvas.delete(music_list_information[index]['frame'])
-                        music_list_information[index]['frame'] = None
-                elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
-                      music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
-                    tk_frame = self._load_image(frame_path, frame_width*frame_time, frame_height*frame_time)
-                    music_list_information[index]['frame'] = self.canvas.create_image(
-                        music_list_information[index]['x_position'],
-                        canvas_height // 2 + 50,
-                        image=tk_frame,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_frame)
-
-                #曲名
-                if music_list_information[index]['title']:
-                    self.canvas.coords(music_list_information[index]['title'], music_list_information[index]['x_position'], title_y_position)
-                    if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
-                        self.canvas.delete(music_list_information[index]['title'])
-                        music_list_information[index]['title'] = None
-                elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
-                      music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
-                    text = music['Name']
-                    text, font_size = self._get_adaptive_font_size(text, "SEGA_MaruGothic-DB", 582, 56, initial_size=30, min_size=20)
-                    music_list_information[index]['title'] = self.canvas.create_text(
-                        music_list_information[index]['x_position'],
-                        title_y_position,
-                        text=text,
-                        font=("SEGA_MaruGothic-DB", font_size),
-                        fill="black",
-                        anchor=tk.CENTER
-                    )
+            receive_cards()
+            nonlocal moved_distance, spin_start
+            if spin_start is None:
+                spin_start = time.monotonic()
+            elapsed = time.monotonic() - spin_start
+            step_distance = int(distance_at(elapsed)) - moved_distance
+            moved_distance += step_distance
+            if strip_mode:
+                move_tiles()
+            else:
+                index = 0
+                for music in random_music_list:
+                    music_list_information[index]['x_position'] -= step_distance
 
-                #曲师
-                if music_list_information[index]['composer']:
-                    self.canvas.coords(music_list_information[index]['composer'], music_list_information[index]['x_position'], title_y_position + 44)
-                    if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
-                        self.canvas.delete(music_list_information[index]['composer'])
-                        music_list_information[index]['composer'] = None
-                elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
-                        music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
-                    text = music['Composer']
-                    text, font_size = self._get_adaptive_font_size(text, "SEGA_MaruGothic-DB", 582, 56, initial_size=16, min_size=12)
-                    music_list_information[index]['composer'] = self.canvas.create_text(
-                        music_list_information[index]['x_position'],
-                        title_y_position + 44,
-                        text=text,
-                        font=("SEGA_MaruGothic-DB", font_size),
-                        fill="black",
-                        anchor=tk.CENTER
-                    )
+                    if music_list_information[index]['box']:
+                        self.canvas.coords(music_list_information[index]['box'], music_list_information[index]['x_position'], canvas_height // 2 + self._scale(50, 'y'))
+                        if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
+                            self.canvas.delete(music_list_information[index]['box'])
+                            music_list_information[index]['box'] = None
+                    elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
+                          music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
+                        show_card(index)
 
-                #曲绘
-                if music_list_information[index]['jacket']:
-                    self.canvas.coords(music_list_information[index]['jacket'], music_list_information[index]['x_position'], jacket_y_position)
-                    if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
-                        self.canvas.delete(music_list_information[index]['jacket'])
-                        music_list_information[index]['jacket'] = None
-                elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
-                      music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
-                    tk_jacket = self._load_image(music['Jacket'], jacket_width*jacket_time, jacket_height*jacket_time)
-                    music_list_information[index]['jacket'] = self.canvas.create_image(
-                        music_list_information[index]['x_position'],
-                        jacket_y_position,
-                        image=tk_jacket,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_jacket)
-
-                #等级框
-                if music_list_information[index]['level']:
-                    self.canvas.coords(music_list_information[index]['level'], music_list_information[index]['x_position'] - level_dx_position, level_y_position)
-                    if music_list_information[index]['x_position'] + frame_width * frame_time // 2 < 0:
-                        self.canvas.delete(music_list_information[index]['level'])
-                        music_list_information[index]['level'] = None
-                elif (music_list_information[index]['x_position'] - frame_width * frame_time // 2 <= canvas_width and
-                      music_list_information[index]['x_position'] + frame_width * frame_time // 2 >=0):
-                    tk_level = self._load_image(level_image_path, level_width*level_time, level_height*level_time, crop=crop_region)
-                    music_list_information[index]['level'] = self.canvas.create_image(
-                        music_list_information[index]['x_position'] - level_dx_position,
-                        level_y_position,
-                        image=tk_level,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_level)
+                    index += 1
 
-                index += 1
+            if elapsed >= spin_duration:
+                if strip_mode:
+                    swap_tiles_for_cards()
+                self.root.after(700, fade_out)
+                return
+            self.root.after(next_frame_delay(spin_start), move)
 
-            # 每隔30毫秒调用一次移动函数
-            self.root.after(30, move)
+        # 其余卡片在开始滚动前的1秒里由线程池合成，Tk线程只负责取出来创建PhotoImage
+        preroll_start = time.monotonic()
+        def wait_for_cards():
+            if self.current_process != process:
+                cancel_rendering()
+                return
+            receive_cards()
+            receive_tiles()
+            remaining = 1000 - int((time.monotonic() - preroll_start) * 1000)
+            if remaining > 0:
+                self.root.after(min(10, remaining), wait_for_cards)
+            else:
+                move()
 
-        self.root.after(1000, move)
+        self.root.after(10, wait_for_cards)
             
-    def _update_selection(self, data):
-        """更新选曲显示"""
+    def _compose_music_card(self, music):
+        """合成一张选曲卡片（边框、曲绘、等级、曲名、曲师、BPM、谱师），返回PIL图像，可以在工作线程里调用"""
+        image_time = 1.4
+
+        # 边框图片大小
+        frame_width = self._scale(424, 'x')
+        frame_height = self._scale(510, 'y')
+        frame_time = image_time
+        frame_path = Utils().resource_path("assets/picture/frame.png")
+
+        #曲绘图片大小
+        jacket_width = self._scale(300, 'x')
+        jacket_height = self._scale(300, 'y')
+        jacket_time = image_time
+        jacket_dy_position = self._scale(100, 'y')
+
+        #两侧的等级框
+        level_image_path = Utils().resource_path("assets/picture/levels.dds")
+        level_left = 4
+        level_top = 1
+        level_right = 79
+        level_bottom = 85
+        level_width = self._scale(level_right - level_left, 'x')
+        level_height = self._scale(level_bottom - level_top, 'y')
+        level_time = image_time
+        level_dx_position = self._scale(223, 'x')
+        level_dy_position = self._scale(160, 'y')
+
+        level_number_path = level_image_path
+        level_number_top = 142
+        level_number_bottom = 177
+        level_number_left = [
+            12, 54, 92, 132, 171, 212, 252, 293, 331, 371
+        ]
+        level_number_right = [
+            36, 69, 117, 157, 197, 237, 276, 316, 356, 540
+        ]
+        level_plus_top = 140
+        level_plus_bottom = 154
+        level_plus_left = 411
+        level_plus_right = 424
+        level_plus_width = self._scale(level_plus_right - level_plus_left, 'x')
+        level_plus_height = self._scale(level_plus_bottom - level_plus_top, 'y')
+        level_number_height = self._scale(level_number_bottom - level_number_top, 'y')
+        level_number_time = level_time
+
+        level_number_dy_position = self._scale(178, 'y')
+
+        title_dy_position = self._scale(240, 'y')
+        composer_dy_position = self._scale(288, 'y')
+
+        BPM_dx_position = self._scale(256, 'x')
+        BPM_dy_position = self._scale(328, 'y')
+        BPM_font_size = self._scale_font_size(24)
+
+        nd_top = 114
+        nd_left = 193
+        nd_right = 311
+        nd_bottom = 124
+
+        nd_width = self._scale(nd_right - nd_left, 'x')
+        nd_height = self._scale(nd_bottom - nd_top, 'y')
+
+        nd_dx_position = self._scale(-191, 'x')
+        nd_dy_position = self._scale(328, 'y')
+        nd_name_dx_position = self._scale(-102, 'x')
+
+        font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
+        BPM_font_path = Utils().resource_path("assets/fonts/Helvetica Bold.ttf")
+
+        layout = self.card_layout(music)
+        music_name, title_font_size = layout['name']
+        composer_name, composer_font_size = layout['composer']
+        nd_name, nd_font_size = layout['nd']
+
+        crop_region = (level_left, level_top, level_right, level_bottom)
+        img_overlay_list=[
+            {
+                'path': music['Jacket'],
+                'position': (
+                    int(frame_width*frame_time) // 2,
+                    int(frame_height*frame_time) // 2 - jacket_dy_position
+                ),
+                'size': (int(jacket_width*jacket_time), int(jacket_height*jacket_time)),
+                'alpha': 1.0,
+                'crop': None
+            },
+            {
+                'path': level_image_path,
+                'position': (
+                    int(frame_width*frame_time) // 2 - level_dx_position,
+                    int(frame_height*frame_time) // 2 + level_dy_position
+                ),
+                'size': (int(level_width*level_time), int(level_height*level_time)),
+                'alpha': 1.0,
+                'crop': crop_region
+            },
+            {
+                'path': level_image_path,
+                'position': (
+                    int(frame_width*frame_time) // 2 + nd_dx_position,
+                    int(frame_height*frame_time) // 2 + nd_dy_position
+                ),
+                'size': (int(nd_width*level_time), int(nd_height*level_time)),
+                'alpha': 1.0,
+                'crop': (nd_left, nd_top, nd_right, nd_bottom)
+            }
+        ]
+
+        # 等级
+        level = music['Const']
+        if level < 10:
+            pass # 应该不会打小于10级的歌吧，我是懒狗不做了
+        elif level < 100:
+            number1 = int(level) // 10
+            number2 = int(level) % 10
+            decimal = level - int(level)
+            crop_region = (level_number_left[number1], level_number_top, level_number_right[number1], level_number_bottom)
+            level_number_width = self._scale(level_number_right[number1] - level_number_left[number1], 'x')
+            img_overlay_list.append(
+                {
+                    'path': level_number_path,
+                    'position': (
+                        int(frame_width * frame_time) // 2 - level_dx_position + self._scale(- 2 - 20, 'x'),
+                        int(frame_height * frame_time) // 2 + level_number_dy_position
+                    ),
+                    'size': (int(level_number_width*level_time), int(level_number_height*level_number_time)),
+                    'alpha': 1.0,
+                    'crop': crop_region
+                }
+            )
+            crop_region = (level_number_left[number2], level_number_top, level_number_right[number2], level_number_bottom)
+            level_number_width = self._scale(level_number_right[number2] - level_number_left[number2], 'x')
+            img_overlay_list.append(
+                {
+                    'path': level_number_path,
+                    'position': (
+                        int(frame_width * frame_time) // 2 - level_dx_position + self._scale(- 2 + 20, 'x'),
+                        int(frame_height * frame_time) // 2 + level_number_dy_position
+                    ),
+                    'size': (int(level_number_width*level_time), int(level_number_height*level_number_time)),
+                    'alpha': 1.0,
+                    'crop': crop_region
+                }
+            )
+            if decimal >= 0.5:
+                crop_region = (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
+                img_overlay_list.append(
+                    {
+                        'path': level_number_path,
+                        'position': (
+                            int(frame_width * frame_time) // 2 - level_dx_position + self._scale(40, 'x'),
+                            int(frame_height * frame_time) // 2 + level_number_dy_position - self._scale(30, 'y')
+                        ),
+                        'size': (int(level_plus_width*level_time), int(level_plus_height*level_number_time)),
+                        'alpha': 1.0,
+                        'crop': crop_region
+                    }
+                )
+        else:
+            pass
+        return self.compose_image(
+            base_image_path=frame_path,
+            img_overlay_list=img_overlay_list,
+            text_overlay_list=[
+                {
+                    'text': music_name,
+                    'position': (
+                        int(frame_width*frame_time) // 2,
+                        int(frame_height*frame_time) // 2 + title_dy_position
+                    ),
+                    'font_size': title_font_size,
+                },
+                {
+                    'text': composer_name,
+                    'position': (
+                        int(frame_width*frame_time) // 2,
+                        int(frame_height*frame_time) // 2 + composer_dy_position
+                    ),
+                    'font_size': composer_font_size,
+                },
+                {
+                    'text': layout['bpm'],
+                    'position': (
+                        int(frame_width*frame_time) // 2 + BPM_dx_position,
+                        int(frame_height*frame_time) // 2 + BPM_dy_position
+                    ),
+                    'font_size': BPM_font_size,
+                    'font_path': BPM_font_path
+                },
+                {
+                    'text': nd_name,
+                    'position': (
+                        int(frame_width*frame_time) // 2 + nd_name_dx_position,
+                        int(frame_height*frame_time) // 2 + nd_dy_position
+                    ),
+                    'font_size': nd_font_size,
+                    'font_path': font_path,
+                    'anchor': 'lm'
+                }
+            ],
+            target_size=(int(frame_width*frame_time), int(frame_height*frame_time))
+        )
+
+    def _update_selection(self, data):
+        """更新选曲显示"""
         self.canvas.delete("all")
         self.image_references.clear()
         
@@ -923,10 +978,6 @@ class DisplayWindow:
             jacket_time = image_time
             jacket_dy_position = self._scale(100, 'y')
 
-            #文字最大长度
-            text_max_width = self._scale(560, 'x')
-            nd_max_width = self._scale(278, 'x')
-
             level_image_path = Utils().resource_path("assets/picture/levels.dds")
             level_left = 4
             level_top = 1
@@ -976,7 +1027,6 @@ class DisplayWindow:
             nd_dx_position = self._scale(-191, 'x')
             nd_dy_position = self._scale(328, 'y')
             nd_name_dx_position = self._scale(-102, 'x')
-            _nd_font_size = 16
 
             font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
             BPM_font_path = Utils().resource_path("assets/fonts/Helvetica Bold.ttf")
@@ -1005,7 +1055,7 @@ class DisplayWindow:
             process_text = data['process']
 
             #比赛进程
-            tk_new_overlay0 = self.overlay_image(
+            tk_new_overlay0 = self._selection_layer('process', process_text, lambda: self.overlay_image(
                 base_image_path=kop_frame_path,
                 img_overlay_list=[],
                 text_overlay_list=[
@@ -1022,7 +1072,7 @@ class DisplayWindow:
                     }
                 ],
                 target_size=(kop_frame_width, kop_frame_height)
-            )
+            ))
             if tk_new_overlay0:
                 self.canvas.create_image(
                     canvas_width // 2,
@@ -1062,7 +1112,7 @@ class DisplayWindow:
                 self.image_references.append(tk_new_overlay1)
             """
             
-            tk_new_overlay1 = self.overlay_image(
+            tk_new_overlay1 = self._selection_layer('1p_nameplate', (data['team1'], data['player1']), lambda: self.overlay_image(
                 base_image_path=title_frame_path,
                 img_overlay_list=[],
                 text_overlay_list=[
@@ -1078,7 +1128,7 @@ class DisplayWindow:
                     }
                 ],
                 target_size=(title_frame_width, title_frame_height)
-            )
+            ))
             if tk_new_overlay1:
                 self.canvas.create_image(
                     canvas_width // 2 - self._scale(400, 'x'),
@@ -1088,7 +1138,7 @@ class DisplayWindow:
                 )
                 self.image_references.append(tk_new_overlay1)
 
-            tk_new_overlay2 = self.overlay_image(
+            tk_new_overlay2 = self._selection_layer('2p_nameplate', (data['team2'], data['player2']), lambda: self.overlay_image(
                 base_image_path=title_frame_path,
                 img_overlay_list=[],
                 text_overlay_list=[
@@ -1104,7 +1154,7 @@ class DisplayWindow:
                     }
                 ],
                 target_size=(title_frame_width, title_frame_height)
-            )
+            ))
             if tk_new_overlay2:
                 self.canvas.create_image(
                     canvas_width // 2 + self._scale(400, 'x'),
@@ -1118,9 +1168,10 @@ class DisplayWindow:
             random_music1 = random.choice(list(Utils().music_list.values()))
             music1_id = data['music1'].split()[0]
             music1 = Utils().music_list.get(music1_id, random_music1) # 如果找不到对应曲目，就用随机曲
-            music1_name, title_font_size = self.get_adaptive_font_size(music1['Name'], font_path, text_max_width, 56, initial_size=40, min_size=30)
-            composer1_name, composer_font_size = self.get_adaptive_font_size(music1['Composer'], font_path, text_max_width, 44, initial_size=20, min_size=15)
-            nd1_name, nd_font_size = self.get_adaptive_font_size(music1['ND'], font_path, nd_max_width, 24, initial_size=_nd_font_size, min_size=_nd_font_size)
+            layout1 = self.card_layout(music1)
+            music1_name, title_font_size = layout1['name']
+            composer1_name, composer_font_size = layout1['composer']
+            nd1_name, nd_font_size = layout1['nd']
             jacket1_path = music1['Jacket']
 
             crop_region = (level_left, level_top, level_right, level_bottom)
@@ -1210,7 +1261,7 @@ class DisplayWindow:
             else:
                 pass
             
-            tk_left_picture = self.overlay_image(
+            tk_left_picture = self._selection_layer('1p_card', jacket1_path, lambda: self.overlay_image(
                 base_image_path=frame_path,
                 img_overlay_list=img_overlay_list1,
                 text_overlay_list=[
@@ -1231,7 +1282,7 @@ class DisplayWindow:
                         'font_size': composer_font_size,
                     },
                     {
-                        'text': str(round(float(music1['BPM']))),
+                        'text': layout1['bpm'],
                         'position': (
                             int(frame_width*frame_time) // 2 + BPM_dx_position,
                             int(frame_height*frame_time) // 2 + BPM_dy_position
@@ -1251,7 +1302,7 @@ class DisplayWindow:
                     }
                 ],
                 target_size=(int(frame_width*frame_time), int(frame_height*frame_time))
-            )
+            ))
             if tk_left_picture:
                 self.canvas.create_image(
                     canvas_width // 2 - self._scale(400, 'x'),
@@ -1265,9 +1316,10 @@ class DisplayWindow:
             random_music1 = random.choice(list(Utils().music_list.values()))
             music2_id = data['music2'].split()[0]
             music2 = Utils().music_list.get(music2_id, random_music1) # 如果找不到对应曲目，就用随机曲
-            music2_name, title_font_size = self.get_adaptive_font_size(music2['Name'], font_path, text_max_width, 56, initial_size=40, min_size=30)
-            composer2_name, composer_font_size = self.get_adaptive_font_size(music2['Composer'], font_path, text_max_width, 44, initial_size=20, min_size=15)
-            nd2_name, nd_font_size = self.get_adaptive_font_size(music2['ND'], font_path, nd_max_width, 24, initial_size=_nd_font_size, min_size=_nd_font_size)
+            layout2 = self.card_layout(music2)
+            music2_name, title_font_size = layout2['name']
+            composer2_name, composer_font_size = layout2['composer']
+            nd2_name, nd_font_size = layout2['nd']
             jacket2_path = music2['Jacket']
 
             crop_region = (level_left, level_top, level_right, level_bottom)
@@ -1357,7 +1409,7 @@ class DisplayWindow:
             else:
                 pass
             
-            tk_right_picture = self.overlay_image(
+            tk_right_picture = self._selection_layer('2p_card', jacket2_path, lambda: self.overlay_image(
                 base_image_path=frame_path,
                 img_overlay_list=img_overlay_list1,
                 text_overlay_list=[
@@ -1378,7 +1430,7 @@ class DisplayWindow:
                         'font_size': composer_font_size,
                     },
                     {
-                        'text': str(round(float(music2['BPM']))),
+                        'text': layout2['bpm'],
                         'position': (
                             int(frame_width*frame_time) // 2 + BPM_dx_position,
                             int(frame_height*frame_time) // 2 + BPM_dy_position
@@ -1398,7 +1450,7 @@ class DisplayWindow:
                     }
                 ],
                 target_size=(int(frame_width*frame_time), int(frame_height*frame_time))
-            )
+            ))
             if tk_right_picture:
                 self.canvas.create_image(
                     canvas_width // 2 + self._scale(400, 'x'),
@@ -1702,15 +1754,144 @@ class DisplayWindow:
                 pass
 
     def _show_round_result(self, data):
+        """显示比赛结果，按曲数从RESULT_LAYOUTS取排版，编译好的绘制计划按曲数缓存"""
         self.canvas.delete("all")
         self.image_references.clear()
-        
+
         canvas_width = int(self.canvas.winfo_width())
         canvas_height = int(self.canvas.winfo_height())
-        
+
         # 显示背景
         self._display_background('lv_background')
 
+        try:
+            track_count = int(data['music_number'])
+        except (KeyError, ValueError, TypeError):
+            return
+        if track_count not in self.RESULT_LAYOUTS:
+            return
+        plan = self._result_plan(track_count)
+
+        # 获取曲目信息和分数
+        tracks = []
+        for track in range(1, track_count + 1):
+            random_music = random.choice(list(Utils().music_list.values()))
+            music_id = data[f'track{track}_music'].split()[0]
+            music = Utils().music_list.get(music_id, random_music) # 如果找不到对应曲目，就用随机曲
+            scores = []
+            for player in (1, 2):
+                try:
+                    scores.append(max(0, min(1010000, int(data[f'track{track}_{player}p_score']))))
+                except (ValueError, TypeError):
+                    scores.append(0)
+            tracks.append((music, scores))
+        total_scores = [sum(scores[player] for music, scores in tracks) for player in (0, 1)]
+
+        #比赛进程
+        kop = plan['kop']
+        tk_new_overlay0 = self.overlay_image(
+            base_image_path=kop['path'],
+            img_overlay_list=[],
+            text_overlay_list=[dict(kop['text'], text=data['process'])],
+            target_size=kop['size']
+        )
+        if tk_new_overlay0:
+            self.canvas.create_image(
+                canvas_width // 2,
+                kop['y'],  # 位置
+                image=tk_new_overlay0,
+                anchor=tk.CENTER
+            )
+            self.image_references.append(tk_new_overlay0)
+
+        # 左右两侧的总成绩框
+        panel = plan['panel']
+        for player in (0, 1):
+            total_score = total_scores[player]
+            if total_score >= total_scores[1 - player]:
+                rank_path = panel['rank_paths'][0]
+            else:
+                rank_path = panel['rank_paths'][1]
+            overlay_list = panel['overlays'] + [
+                dict(panel['rank'], path=rank_path), # 排名
+                self.score_renderer.overlay(total_score, *panel['total_score'])
+            ]
+            text_overlay_list = [dict(panel['team_text'], text=data[f'team{player + 1}'])] # 队名
+            if panel['player_text']:
+                text_overlay_list.append(dict(panel['player_text'], text=data[f'player{player + 1}'])) # 选手名
+            tk_new_overlay = self.overlay_image(
+                base_image_path=None,
+                img_overlay_list=overlay_list,
+                text_overlay_list=text_overlay_list,
+                target_size=panel['size'],
+                base_color=(254, 254, 228, 255)  # 淡黄色
+            )
+            if tk_new_overlay:
+                self.canvas.create_image(
+                    canvas_width // 2 + panel['x'][player],
+                    canvas_height // 2 + panel['y'],  # 位置
+                    image=tk_new_overlay,
+                    anchor=tk.CENTER
+                )
+                self.image_references.append(tk_new_overlay)
+
+        # 各个单曲成绩，先1P再2P
+        frame = plan['track']
+        for player in (0, 1):
+            for track, (music, scores) in enumerate(tracks):
+                music_name, title_font_size = self.card_layout(music)['result_name']
+                overlay_list = frame['overlays'][track] + [
+                    dict(frame['jacket'], path=music['Jacket']), # 曲绘
+                    frame['level_frame'] # 等级框
+                ]
+
+                # 等级
+                const = music['Const']
+                if const < 10:
+                    pass # 应该不会打小于10级的歌吧，我是懒狗不做了
+                elif const <100:
+                    number1 = int(const) // 10
+                    number2 = int(const) % 10
+                    decimal = const - int(const)
+                    overlay_list.append(frame['level_tens'][number1])
+                    overlay_list.append(frame['level_ones'][number2])
+                    if decimal >= 0.5:
+                        overlay_list.append(frame['level_plus'])
+                else:
+                    pass
+
+                # 成绩
+                overlay_list.append(self.score_renderer.overlay(scores[player], *frame['score'], pitch=0.65, bounds=frame['size']))
+                tk_left_picture = self.overlay_image(
+                    base_image_path=frame['path'],
+                    img_overlay_list=overlay_list,
+                    text_overlay_list=[dict(frame['name_text'], text=music_name, font_size=title_font_size)],
+                    target_size=frame['size']
+                )
+                if tk_left_picture:
+                    self.canvas.create_image(
+                        canvas_width // 2 + panel['x'][player],
+                        canvas_height // 2 + frame['y'][track],
+                        image=tk_left_picture,
+                        anchor=tk.CENTER
+                    )
+                    self.image_references.append(tk_left_picture)
+
+    def _result_plan(self, track_count):
+        """取出某个曲数的绘制计划，窗口大小固定，所以每个曲数只需要编译一次"""
+        plan = self.result_plans.get(track_count)
+        if plan is None:
+            plan = self.result_plans[track_count] = self._build_result_plan(track_count, self.RESULT_LAYOUTS[track_count])
+        return plan
+
+    def _result_y(self, value, height):
+        """排版表里的y：数字为距离顶部的值，('middle', 值)为距离中线的值"""
+        if isinstance(value, tuple):
+            return height // 2 + self._scale(value[1], 'y')
+        return self._scale(value, 'y')
+
+    def _build_result_plan(self, track_count, layout):
+        """把排版表的一行编译成绘制计划：缩放好的位置、大小和不随数据变化的覆盖图，只剩曲目、分数和名字要在显示时填进去"""
         image_time = 1.3
 
         result_frame_time = image_time
@@ -1718,33 +1899,9 @@ class DisplayWindow:
         result_frame_width = self._scale(632, 'x')
         result_frame_height = self._scale(92, 'y')
 
-        result_num_path = Utils().resource_path("assets/picture/result_num.dds")
-        result_num_top = 2
-        result_num_bottom = 93
-        result_num_left = [
-            12, 112, 197, 293, 386, 480, 574, 668, 763, 857
-        ]
-        result_num_right = [
-            82, 171, 270, 365, 459, 554, 646, 741, 834, 929
-        ]
+        # 成绩数字的缩放倍数：总成绩、单曲成绩
         result_total_time = 1.3
         result_single_time = 0.8
-        result_num_height = self._scale(result_num_bottom - result_num_top, 'y')
-        result_num_width = [
-            self._scale(result_num_right[i] - result_num_left[i], 'x') for i in range(10)
-        ]
-        
-        result_comma_path = Utils().resource_path("assets/picture/result_num.dds")
-        result_comma_top = 44
-        result_comma_bottom = 93
-        result_comma_left = 951
-        result_comma_right = 997
-        result_comma_height = self._scale(result_comma_bottom - result_comma_top, 'y')
-        result_comma_width = self._scale(result_comma_right - result_comma_left, 'x')
-
-        font_path = Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
-        text_max_width = self._scale(580, 'x')
-        text_font_size = 23
 
         jacket_width = self._scale(83 * image_time, 'x')
         jacket_height = self._scale(83 * image_time, 'y')
@@ -1775,6 +1932,7 @@ class DisplayWindow:
         level_number_height = self._scale(level_number_bottom - level_number_top, 'y')
         level_number_time = 1.0
 
+        # result_texture.dds里只有TRACK 1-4的图标
         track_path = Utils().resource_path("assets/picture/result_texture.dds")
         track_top = 5
         track_bottom = 75
@@ -1817,35 +1975,6 @@ class DisplayWindow:
         rank_width = self._scale(170 * rank_time, 'x')
         rank_height = self._scale(156 * rank_time, 'y')
 
-         # 获取曲目信息
-        random_music1 = random.choice(list(Utils().music_list.values()))
-        music1_id = data['track1_music'].split()[0]
-        music1 = Utils().music_list.get(music1_id, random_music1) # 如果找不到对应曲目，就用随机曲
-        music1_name, title_font_size0 = self.get_adaptive_font_size(music1['Name'], font_path, text_max_width, 56, initial_size=text_font_size, min_size=text_font_size)
-        music1_const = music1['Const']
-        jacket1_path = music1['Jacket']
-
-        random_music2 = random.choice(list(Utils().music_list.values()))
-        music2_id = data['track2_music'].split()[0]
-        music2 = Utils().music_list.get(music2_id, random_music2) # 如果找不到对应曲目，就用随机曲
-        music2_name, title_font_size0 = self.get_adaptive_font_size(music2['Name'], font_path, text_max_width, 56, initial_size=text_font_size, min_size=text_font_size)
-        music2_const = music2['Const']
-        jacket2_path = music2['Jacket']
-
-        random_music3 = random.choice(list(Utils().music_list.values()))
-        music3_id = data['track3_music'].split()[0]
-        music3 = Utils().music_list.get(music3_id, random_music3) # 如果找不到对应曲目，就用随机曲
-        music3_name, title_font_size0 = self.get_adaptive_font_size(music3['Name'], font_path, text_max_width, 56, initial_size=text_font_size, min_size=text_font_size)
-        music3_const = music3['Const']
-        jacket3_path = music3['Jacket']
-
-        random_music4 = random.choice(list(Utils().music_list.values()))
-        music4_id = data['track4_music'].split()[0]
-        music4 = Utils().music_list.get(music4_id, random_music4) # 如果找不到对应曲目，就用随机曲
-        music4_name, title_font_size0 = self.get_adaptive_font_size(music4['Name'], font_path, text_max_width, 56, initial_size=text_font_size, min_size=text_font_size)
-        music4_const = music4['Const']
-        jacket4_path = music4['Jacket']
-
         kop_frame_path = Utils().resource_path("assets/picture/kop_frame.dds")
         kop_frame_time = 1.8
         kop_frame_width = self._scale(316 * kop_frame_time, 'x')
@@ -1853,78 +1982,41 @@ class DisplayWindow:
 
         kop_font_path = Utils().resource_path("assets/fonts/AnJingChenXingShuFanTi-2.ttf")
         kop_font_size = self._scale_font_size(96)
-        process_text = data['process']
-
-        if data['music_number'] == '2':
-            #比赛进程
-            tk_new_overlay0 = self.overlay_image(
-                base_image_path=kop_frame_path,
-                img_overlay_list=[],
-                text_overlay_list=[
-                    {
-                        'text': process_text,
-                        'position': (
-                            kop_frame_width // 2,
-                            kop_frame_height // 2
-                        ),
-                        'font_size': kop_font_size,
-                        'font_path': kop_font_path,
-                        'anchor': 'mm',
-                        'color': (255, 255, 255)
-                    }
-                ],
-                target_size=(kop_frame_width, kop_frame_height)
-            )
-            if tk_new_overlay0:
-                self.canvas.create_image(
-                    canvas_width // 2,
-                    self._scale(160, 'y'),  # 位置
-                    image=tk_new_overlay0,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay0)
 
-            # 大框大小
-            new_width = self._scale(890, 'x')  # 指定大小
-            new_height = self._scale(670, 'y')
-            gray_overlay = Image.new('RGBA', (new_width - self._scale(20, 'x'), self._scale(282, 'y')), (30, 44, 60, 255))  # 靛青色长方形
-            
-            # 分数
-            try:
-                track1_score1 = max(0, min(1010000, int(data['track1_1p_score'])))
-            except (ValueError, TypeError):
-                track1_score1 = 0
-            try:
-                track2_score1 = max(0, min(1010000, int(data['track2_1p_score'])))
-            except (ValueError, TypeError):
-                track2_score1 = 0
-            total_score1 = track1_score1 + track2_score1
+        #比赛进程
+        kop = {
+            'path': kop_frame_path,
+            'size': (kop_frame_width, kop_frame_height),
+            'y': self._scale(layout['kop_y'], 'y'),
+            'text': {
+                'position': (
+                    kop_frame_width // 2,
+                    kop_frame_height // 2
+                ),
+                'font_size': kop_font_size,
+                'font_path': kop_font_path,
+                'anchor': 'mm',
+                'color': (255, 255, 255)
+            }
+        }
 
-            try:
-                track1_score2 = max(0, min(1010000, int(data['track1_2p_score'])))
-            except (ValueError, TypeError):
-                track1_score2 = 0
-            try:
-                track2_score2 = max(0, min(1010000, int(data['track2_2p_score'])))
-            except (ValueError, TypeError):
-                track2_score2 = 0
-            total_score2 = track1_score2 + track2_score2
-
-            # 左侧框
-            if total_score1 >= total_score2:
-                rank_path = rank1_path
-            else:
-                rank_path = rank2_path
-            overlay_list1 = [
-                {'image': gray_overlay, 'position': (new_width//2, new_height//2 + self._scale(185, 'y')), 'anchor': 'center'},
-                {
-                    'path': team_frame_path, # 队伍框
-                    'size': (team_frame_width, team_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(28, 'y')
-                    )
-                },
+        # 总成绩框大小
+        new_width = self._scale(890, 'x')  # 指定大小
+        new_height = self._scale(layout['panel_height'], 'y')
+        gray_overlay = Image.new('RGBA', (new_width - self._scale(20, 'x'), self._result_y(layout['gray_height'], new_height)), (30, 44, 60, 255))  # 靛青色长方形
+        panel_overlays = [
+            {'image': gray_overlay, 'position': (new_width//2, self._result_y(layout['gray_y'], new_height)), 'anchor': 'center'},
+            {
+                'path': team_frame_path, # 队伍框
+                'size': (team_frame_width, team_frame_height),
+                'position': (
+                    new_width // 2,
+                    self._scale(28, 'y')
+                )
+            }
+        ]
+        if layout['show_player']:
+            panel_overlays.append(
                 {
                     'path': title_frame_path, # 昵称框
                     'size': (title_frame_width, title_frame_height),
@@ -1932,1243 +2024,154 @@ class DisplayWindow:
                         new_width // 2,
                         self._scale(136, 'y')
                     )
-                },
-                {
-                    'path': total_score_path, # 总成绩图标
-                    'size': (total_score_width, total_score_height),
-                    'position': (
-                        self._scale(215, 'x'),
-                        self._scale(207, 'y')
-                    ),
-                    'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
-                },
-                {
-                    'path': rank_path, # 排名
-                    'size': (rank_width, rank_height),
-                    'position': (
-                        self._scale(900, 'x'),
-                        self._scale(173, 'y')
-                    )
                 }
-            ]
-            position_x = new_width - self._scale(40, 'x')
-            for index in range(len(str(total_score1))):
-                digit = int(str(total_score1)[-index-1])
-                if index % 3 == 0 and index != 0:
-                    position_x -= self._scale(75, 'x')
-                    overlay_list1.append(
-                        {
-                            'path': result_comma_path,
-                            'position': (
-                                position_x,
-                                self._scale(300 + 38, 'y')
-                            ),
-                            'size': (int(result_comma_width * result_total_time), int(result_comma_height * result_total_time)),
-                            'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                        }
-                    )
-                    position_x -= self._scale(65, 'x')
-                else:
-                    position_x -= self._scale(90, 'x')
-                overlay_list1.append(
+            )
+        panel_overlays.append(
+            {
+                'path': total_score_path, # 总成绩图标
+                'size': (total_score_width, total_score_height),
+                'position': (
+                    self._scale(215, 'x'),
+                    self._scale(layout['total_icon_y'], 'y')
+                ),
+                'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
+            }
+        )
+        panel = {
+            'size': (new_width, new_height),
+            'x': (-self._scale(460, 'x'), self._scale(460, 'x')),
+            'y': self._scale(layout['panel_y'], 'y'),
+            'overlays': panel_overlays,
+            'rank_paths': (rank1_path, rank2_path),
+            'rank': {
+                'size': (rank_width, rank_height),
+                'position': (
+                    self._scale(900, 'x'),
+                    self._scale(layout['rank_y'], 'y')
+                )
+            },
+            # 总成绩数字：起始x、数字y、逗号y、倍数、间距、范围
+            'total_score': (
+                new_width - self._scale(40, 'x'),
+                self._result_y(layout['total_score_y'], new_height),
+                self._result_y(layout['total_comma_y'], new_height),
+                result_total_time,
+                1.0,
+                (new_width, new_height)
+            ),
+            'team_text': {
+                'position': (
+                    self._scale(200, 'x'),
+                    self._scale(45, 'y')
+                ),
+                'font_size': team_font_size,
+                'font_path': team_font_path,
+                'anchor': 'lm',
+                'color': (255, 255, 255)
+            },
+            'player_text': None
+        }
+        if layout['show_player']:
+            panel['player_text'] = {
+                'position': (
+                    new_width // 2,
+                    self._scale(133, 'y')
+                ),
+                'font_size': title_font_size,
+                'font_path': title_font_path,
+                'anchor': 'mm'
+            }
+
+        # 单曲成绩框
+        frame_width = int(result_frame_width * result_frame_time)
+        frame_height = int(result_frame_height * result_frame_time)
+        track_overlays = []
+        for track in range(track_count):
+            overlays = []
+            if track < len(track_left):
+                overlays.append(
                     {
-                        'path': result_num_path,
+                        'path': track_path, # Track
                         'position': (
-                            position_x,
-                            self._scale(300, 'y')
+                            self._scale(61, 'x'),
+                            frame_height // 2
                         ),
-                        'size': (int(result_num_width[digit] * result_total_time), int(result_num_height * result_total_time)),
-                        'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
+                        'size': (track_width[track], track_height),
+                        'crop': (track_left[track], track_top, track_right[track], track_bottom)
                     }
                 )
-            tk_new_overlay1 = self.overlay_image(
-                base_image_path=None,
-                img_overlay_list=overlay_list1,
-                text_overlay_list=[
-                    {
-                        'text': data['team1'], # 队名
-                        'position': (
-                            self._scale(200, 'x'),
-                            self._scale(45, 'y')
-                        ),
-                        'font_size': team_font_size,
-                        'font_path': team_font_path,
-                        'anchor': 'lm',
-                        'color': (255, 255, 255)
-                    },
+            track_overlays.append(overlays)
+
+        # 等级数字，十位和个位的位置不同
+        level_tens = []
+        level_ones = []
+        for number in range(10):
+            crop_region = (level_number_left[number], level_number_top, level_number_right[number], level_number_bottom)
+            level_number_width = self._scale(level_number_right[number] - level_number_left[number], 'x')
+            for level_numbers, dx in ((level_tens, -18), (level_ones, 12)):
+                level_numbers.append(
                     {
-                        'text': data['player1'], # 选手名
+                        'path': level_number_path,
                         'position': (
-                            new_width // 2,
-                            self._scale(133, 'y')
+                            self._scale(273 + dx, 'x'),
+                            self._scale(88, 'y'),
                         ),
-                        'font_size': title_font_size,
-                        'font_path': title_font_path,
-                        'anchor': 'mm'
-                    }
-                ],
-                target_size=(new_width, new_height),
-                base_color=(254, 254, 228, 255)  # 淡黄色
-            )
-            if tk_new_overlay1:
-                self.canvas.create_image(
-                    canvas_width // 2 - self._scale(460, 'x'),
-                    canvas_height // 2 + self._scale(100 - 10, 'y'),  # 位置
-                    image=tk_new_overlay1,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay1)
-
-            # 右侧框
-            if total_score2 >= total_score1:
-                rank_path = rank1_path
-            else:
-                rank_path = rank2_path
-            overlay_list2 = [
-                {'image': gray_overlay, 'position': (new_width//2, new_height//2 + self._scale(185, 'y')), 'anchor': 'center'},
-                {
-                    'path': team_frame_path, # 队伍框
-                    'size': (team_frame_width, team_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(28, 'y')
-                    )
-                },
-                {
-                    'path': title_frame_path, # 昵称框
-                    'size': (title_frame_width, title_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(136, 'y')
-                    )
-                },
-                {
-                    'path': total_score_path, # 总成绩图标
-                    'size': (total_score_width, total_score_height),
-                    'position': (
-                        self._scale(215, 'x'),
-                        self._scale(207, 'y')
-                    ),
-                    'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
-                },
-                {
-                    'path': rank_path, # 排名
-                    'size': (rank_width, rank_height),
-                    'position': (
-                        self._scale(900, 'x'),
-                        self._scale(173, 'y')
-                    )
-                }
-            ]
-            position_x = new_width - self._scale(40, 'x')
-            for index in range(len(str(total_score2))):
-                digit = int(str(total_score2)[-index-1])
-                if index % 3 == 0 and index != 0:
-                    position_x -= self._scale(75, 'x')
-                    overlay_list2.append(
-                        {
-                            'path': result_comma_path,
-                            'position': (
-                                position_x,
-                                self._scale(300 + 38, 'y')
-                            ),
-                            'size': (int(result_comma_width * result_total_time), int(result_comma_height * result_total_time)),
-                            'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                        }
-                    )
-                    position_x -= self._scale(65, 'x')
-                else:
-                    position_x -= self._scale(90, 'x')
-                overlay_list2.append(
-                    {
-                        'path': result_num_path,
-                        'position': (
-                            position_x,
-                            self._scale(300, 'y')
-                        ),
-                        'size': (int(result_num_width[digit] * result_total_time), int(result_num_height * result_total_time)),
-                        'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                    }
-                )
-
-            tk_new_overlay2 = self.overlay_image(
-                base_image_path=None,
-                img_overlay_list=overlay_list2,
-                text_overlay_list=[
-                    {
-                        'text': data['team2'], # 队名
-                        'position': (
-                            self._scale(200, 'x'),
-                            self._scale(45, 'y')
-                        ),
-                        'font_size': team_font_size,
-                        'font_path': team_font_path,
-                        'anchor': 'lm',
-                        'color': (255, 255, 255)
-                    },
-                    {
-                        'text': data['player2'], # 选手名
-                        'position': (
-                            new_width // 2,
-                            self._scale(133, 'y')
-                        ),
-                        'font_size': title_font_size,
-                        'font_path': title_font_path,
-                        'anchor': 'mm'
-                    }
-                ],
-                target_size=(new_width, new_height),
-                base_color=(254, 254, 228, 255)  # 淡黄色
-            )
-            if tk_new_overlay2:
-                self.canvas.create_image(
-                    canvas_width // 2 + self._scale(460, 'x'),
-                    canvas_height // 2 + self._scale(100 - 10, 'y'),  # 位置
-                    image=tk_new_overlay2,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay2)
-
-            # 各个单曲成绩
-            for Index in range(4):
-                if Index == 0:
-                    score = track1_score1
-                elif Index == 1:
-                    score = track2_score1
-                elif Index == 2:
-                    score = track1_score2
-                elif Index == 3:
-                    score = track2_score2
-                if Index < 2:
-                    position_in_canvas = -460
-                elif Index >= 2:
-                    position_in_canvas = 460
-                if Index % 2 == 0:
-                    music_name = music1_name
-                    const = music1_const
-                    jacket_path = jacket1_path
-                elif Index % 2 == 1:
-                    music_name = music2_name
-                    const = music2_const
-                    jacket_path = jacket2_path
-
-                overlay_list = [
-                    {
-                        'path': track_path, # Track
-                        'position': (
-                            self._scale(61, 'x'),
-                            int(result_frame_height * result_frame_time) // 2
-                        ),
-                        'size': (track_width[Index % 2], track_height),
-                        'crop': (track_left[Index % 2], track_top, track_right[Index % 2], track_bottom)
-                    },
-                    {
-                        'path': jacket_path, # 曲绘
-                        'position': (
-                            self._scale(174, 'x'),
-                            int(result_frame_height * result_frame_time) // 2
-                        ),
-                        'size': (jacket_width, jacket_height),
-                    },
-                    {
-                        'path': level_frame_path, # 等级框
-                        'position': (
-                            self._scale(273, 'x'),
-                            self._scale(78, 'y'),
-                        ),
-                        'size': (level_frame_width, level_frame_height),
-                        'crop': (level_frame_left, level_frame_top, level_frame_right, level_frame_bottom)
-                    }
-                ]
-
-                # 等级
-                if const < 10:
-                    pass # 应该不会打小于10级的歌吧，我是懒狗不做了
-                elif const <100:
-                    number1 = int(const) // 10
-                    number2 = int(const) % 10
-                    decimal = const - int(const)
-                    crop_region = (level_number_left[number1], level_number_top, level_number_right[number1], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number1] - level_number_left[number1], 'x')
-                    overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                self._scale(273 - 18, 'x'),
-                                self._scale(88, 'y'),
-                            ),
-                            'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    crop_region = (level_number_left[number2], level_number_top, level_number_right[number2], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number2] - level_number_left[number2], 'x')
-                    overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                self._scale(273 + 12, 'x'),
-                                self._scale(88, 'y'),
-                            ),
-                            'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    if decimal >= 0.5:
-                        crop_region = (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
-                        overlay_list.append(
-                            {
-                                'path': level_number_path,
-                                'position': (
-                                    self._scale(273 + 30, 'x'),
-                                    self._scale(78 - 10, 'y'),
-                                ),
-                                'size': (int(level_plus_width*level_number_time), int(level_plus_height*level_number_time)),
-                                'alpha': 1.0,
-                                'crop': crop_region
-                            }
-                        )
-                else:
-                    pass
-
-                # 成绩
-                position_x = int(result_frame_width * result_frame_time) + self._scale(10, 'x')
-                for index in range(len(str(score))):
-                    digit = int(str(score)[-index-1])
-                    if index % 3 == 0 and index != 0:
-                        position_x -= self._scale(75 * 0.65, 'x')
-                        overlay_list.append(
-                            {
-                                'path': result_comma_path,
-                                'position': (
-                                    position_x,
-                                    result_frame_height//2 + self._scale(19 + 37, 'y')
-                                ),
-                                'size': (int(result_comma_width * result_single_time), int(result_comma_height * result_single_time)),
-                                'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                            }
-                        )
-                        position_x -= self._scale(65 * 0.65, 'x')
-                    else:
-                        position_x -= self._scale(90 * 0.65, 'x')
-                    overlay_list.append(
-                        {
-                            'path': result_num_path,
-                            'position': (
-                                position_x,
-                                int(result_frame_height * result_frame_time) // 2 + self._scale(19, 'y')
-                            ),
-                            'size': (int(result_num_width[digit] * result_single_time), int(result_num_height * result_single_time)),
-                            'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                        }
-                    )
-                tk_left_picture = self.overlay_image(
-                    base_image_path=result_frame_path,
-                    img_overlay_list=overlay_list,
-                    text_overlay_list=[
-                        {
-                            'text': music_name,
-                            'position': (
-                                self._scale(245, 'x'),
-                                self._scale(20, 'y')
-                            ),
-                            'font_size': title_font_size0,
-                            'color': (255, 255, 255),
-                            'anchor': 'lm'
-                        },
-                    ],
-                    target_size=(int(result_frame_width*result_frame_time), int(result_frame_height*result_frame_time))
-                )
-                if tk_left_picture:
-                    self.canvas.create_image(
-                        canvas_width // 2 + self._scale(position_in_canvas, 'x'),
-                        canvas_height // 2 + self._scale(150 + 57 + 135 * (Index % 2), 'y'),
-                        image=tk_left_picture,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_left_picture)
-
-        elif data['music_number'] == '3':
-            #比赛进程
-            tk_new_overlay0 = self.overlay_image(
-                base_image_path=kop_frame_path,
-                img_overlay_list=[],
-                text_overlay_list=[
-                    {
-                        'text': process_text,
-                        'position': (
-                            kop_frame_width // 2,
-                            kop_frame_height // 2
-                        ),
-                        'font_size': kop_font_size,
-                        'font_path': kop_font_path,
-                        'anchor': 'mm',
-                        'color': (255, 255, 255)
-                    }
-                ],
-                target_size=(kop_frame_width, kop_frame_height)
-            )
-            if tk_new_overlay0:
-                self.canvas.create_image(
-                    canvas_width // 2,
-                    self._scale(130, 'y'),  # 位置
-                    image=tk_new_overlay0,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay0)
-
-            # 大框大小
-            new_width = self._scale(890, 'x')  # 指定大小
-            new_height = self._scale(800, 'y')
-            gray_overlay = Image.new('RGBA', (new_width - self._scale(20, 'x'), new_height // 2 + self._scale(12, 'y')), (30, 44, 60, 255))  # 靛青色长方形
-            
-            # 分数
-            try:
-                track1_score1 = max(0, min(1010000, int(data['track1_1p_score'])))
-            except (ValueError, TypeError):
-                track1_score1 = 0
-            try:
-                track2_score1 = max(0, min(1010000, int(data['track2_1p_score'])))
-            except (ValueError, TypeError):
-                track2_score1 = 0
-            try:
-                track3_score1 = max(0, min(1010000, int(data['track3_1p_score'])))
-            except (ValueError, TypeError):
-                track3_score1 = 0
-            total_score1 = track1_score1 + track2_score1 + track3_score1
-
-            try:
-                track1_score2 = max(0, min(1010000, int(data['track1_2p_score'])))
-            except (ValueError, TypeError):
-                track1_score2 = 0
-            try:
-                track2_score2 = max(0, min(1010000, int(data['track2_2p_score'])))
-            except (ValueError, TypeError):
-                track2_score2 = 0
-            try:
-                track3_score2 = max(0, min(1010000, int(data['track3_2p_score'])))
-            except (ValueError, TypeError):
-                track3_score2 = 0
-            total_score2 = track1_score2 + track2_score2 + track3_score2
-
-            # 左侧框
-            if total_score1 >= total_score2:
-                rank_path = rank1_path
-            else:
-                rank_path = rank2_path
-            overlay_list1 = [
-                {'image': gray_overlay, 'position': (new_width//2, new_height//2 + self._scale(185, 'y')), 'anchor': 'center'},
-                {
-                    'path': team_frame_path, # 队伍框
-                    'size': (team_frame_width, team_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(28, 'y')
-                    )
-                },
-                {
-                    'path': title_frame_path, # 昵称框
-                    'size': (title_frame_width, title_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(136, 'y')
-                    )
-                },
-                {
-                    'path': total_score_path, # 总成绩图标
-                    'size': (total_score_width, total_score_height),
-                    'position': (
-                        self._scale(215, 'x'),
-                        self._scale(207, 'y')
-                    ),
-                    'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
-                },
-                {
-                    'path': rank_path, # 排名
-                    'size': (rank_width, rank_height),
-                    'position': (
-                        self._scale(900, 'x'),
-                        self._scale(173, 'y')
-                    )
-                }
-            ]
-            position_x = new_width - self._scale(40, 'x')
-            for index in range(len(str(total_score1))):
-                digit = int(str(total_score1)[-index-1])
-                if index % 3 == 0 and index != 0:
-                    position_x -= self._scale(75, 'x')
-                    overlay_list1.append(
-                        {
-                            'path': result_comma_path,
-                            'position': (
-                                position_x,
-                                new_height//2 - self._scale(100 - 38, 'y')
-                            ),
-                            'size': (int(result_comma_width * result_total_time), int(result_comma_height * result_total_time)),
-                            'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                        }
-                    )
-                    position_x -= self._scale(65, 'x')
-                else:
-                    position_x -= self._scale(90, 'x')
-                overlay_list1.append(
-                    {
-                        'path': result_num_path,
-                        'position': (
-                            position_x,
-                            new_height//2 - self._scale(100, 'y')
-                        ),
-                        'size': (int(result_num_width[digit] * result_total_time), int(result_num_height * result_total_time)),
-                        'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                    }
-                )
-            tk_new_overlay1 = self.overlay_image(
-                base_image_path=None,
-                img_overlay_list=overlay_list1,
-                text_overlay_list=[
-                    {
-                        'text': data['team1'], # 队名
-                        'position': (
-                            self._scale(200, 'x'),
-                            self._scale(45, 'y')
-                        ),
-                        'font_size': team_font_size,
-                        'font_path': team_font_path,
-                        'anchor': 'lm',
-                        'color': (255, 255, 255)
-                    },
-                    {
-                        'text': data['player1'], # 选手名
-                        'position': (
-                            new_width // 2,
-                            self._scale(133, 'y')
-                        ),
-                        'font_size': title_font_size,
-                        'font_path': title_font_path,
-                        'anchor': 'mm'
-                    }
-                ],
-                target_size=(new_width, new_height),
-                base_color=(254, 254, 228, 255)  # 淡黄色
-            )
-            if tk_new_overlay1:
-                self.canvas.create_image(
-                    canvas_width // 2 - self._scale(460, 'x'),
-                    canvas_height // 2 + self._scale(100, 'y'),  # 位置
-                    image=tk_new_overlay1,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay1)
-
-            # 右侧框
-            if total_score2 >= total_score1:
-                rank_path = rank1_path
-            else:
-                rank_path = rank2_path
-            overlay_list2 = [
-                {'image': gray_overlay, 'position': (new_width//2, new_height//2 + self._scale(185, 'y')), 'anchor': 'center'},
-                {
-                    'path': team_frame_path, # 队伍框
-                    'size': (team_frame_width, team_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(28, 'y')
-                    )
-                },
-                {
-                    'path': title_frame_path, # 昵称框
-                    'size': (title_frame_width, title_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(136, 'y')
-                    )
-                },
-                {
-                    'path': total_score_path, # 总成绩图标
-                    'size': (total_score_width, total_score_height),
-                    'position': (
-                        self._scale(215, 'x'),
-                        self._scale(207, 'y')
-                    ),
-                    'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
-                },
-                {
-                    'path': rank_path, # 排名
-                    'size': (rank_width, rank_height),
-                    'position': (
-                        self._scale(900, 'x'),
-                        self._scale(173, 'y')
-                    )
-                }
-            ]
-            position_x = new_width - self._scale(40, 'x')
-            for index in range(len(str(total_score2))):
-                digit = int(str(total_score2)[-index-1])
-                if index % 3 == 0 and index != 0:
-                    position_x -= self._scale(75, 'x')
-                    overlay_list2.append(
-                        {
-                            'path': result_comma_path,
-                            'position': (
-                                position_x,
-                                new_height//2 - self._scale(100 - 38, 'y')
-                            ),
-                            'size': (int(result_comma_width * result_total_time), int(result_comma_height * result_total_time)),
-                            'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                        }
-                    )
-                    position_x -= self._scale(65, 'x')
-                else:
-                    position_x -= self._scale(90, 'x')
-                overlay_list2.append(
-                    {
-                        'path': result_num_path,
-                        'position': (
-                            position_x,
-                            new_height//2 - self._scale(100, 'y')
-                        ),
-                        'size': (int(result_num_width[digit] * result_total_time), int(result_num_height * result_total_time)),
-                        'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                    }
-                )
-
-            tk_new_overlay2 = self.overlay_image(
-                base_image_path=None,
-                img_overlay_list=overlay_list2,
-                text_overlay_list=[
-                    {
-                        'text': data['team2'], # 队名
-                        'position': (
-                            self._scale(200, 'x'),
-                            self._scale(45, 'y')
-                        ),
-                        'font_size': team_font_size,
-                        'font_path': team_font_path,
-                        'anchor': 'lm',
-                        'color': (255, 255, 255)
-                    },
-                    {
-                        'text': data['player2'], # 选手名
-                        'position': (
-                            new_width // 2,
-                            self._scale(133, 'y')
-                        ),
-                        'font_size': title_font_size,
-                        'font_path': title_font_path,
-                        'anchor': 'mm'
-                    }
-                ],
-                target_size=(new_width, new_height),
-                base_color=(254, 254, 228, 255)  # 淡黄色
-            )
-            if tk_new_overlay2:
-                self.canvas.create_image(
-                    canvas_width // 2 + self._scale(460, 'x'),
-                    canvas_height // 2 + self._scale(100, 'y'),  # 位置
-                    image=tk_new_overlay2,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay2)
-
-            # 各个单曲成绩
-            for Index in range(6):
-                if Index == 0:
-                    score = track1_score1
-                elif Index == 1:
-                    score = track2_score1
-                elif Index == 2:
-                    score = track3_score1
-                elif Index == 3:
-                    score = track1_score2
-                elif Index == 4:
-                    score = track2_score2
-                elif Index == 5:
-                    score = track3_score2
-                if Index < 3:
-                    position_in_canvas = -460
-                elif Index >= 3:
-                    position_in_canvas = 460
-                if Index % 3 == 0:
-                    music_name = music1_name
-                    const = music1_const
-                    jacket_path = jacket1_path
-                elif Index % 3 == 1:
-                    music_name = music2_name
-                    const = music2_const
-                    jacket_path = jacket2_path
-                elif Index % 3 == 2:
-                    music_name = music3_name
-                    const = music3_const
-                    jacket_path = jacket3_path
-
-                overlay_list = [
-                    {
-                        'path': track_path, # Track
-                        'position': (
-                            self._scale(61, 'x'),
-                            int(result_frame_height * result_frame_time) // 2
-                        ),
-                        'size': (track_width[Index % 3], track_height),
-                        'crop': (track_left[Index % 3], track_top, track_right[Index % 3], track_bottom)
-                    },
-                    {
-                        'path': jacket_path, # 曲绘
-                        'position': (
-                            self._scale(174, 'x'),
-                            int(result_frame_height * result_frame_time) // 2
-                        ),
-                        'size': (jacket_width, jacket_height),
-                    },
-                    {
-                        'path': level_frame_path, # 等级框
-                        'position': (
-                            self._scale(273, 'x'),
-                            self._scale(78, 'y'),
-                        ),
-                        'size': (level_frame_width, level_frame_height),
-                        'crop': (level_frame_left, level_frame_top, level_frame_right, level_frame_bottom)
-                    }
-                ]
-
-                # 等级
-                if const < 10:
-                    pass # 应该不会打小于10级的歌吧，我是懒狗不做了
-                elif const <100:
-                    number1 = int(const) // 10
-                    number2 = int(const) % 10
-                    decimal = const - int(const)
-                    crop_region = (level_number_left[number1], level_number_top, level_number_right[number1], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number1] - level_number_left[number1], 'x')
-                    overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                self._scale(273 - 18, 'x'),
-                                self._scale(88, 'y'),
-                            ),
-                            'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    crop_region = (level_number_left[number2], level_number_top, level_number_right[number2], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number2] - level_number_left[number2], 'x')
-                    overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                self._scale(273 + 12, 'x'),
-                                self._scale(88, 'y'),
-                            ),
-                            'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    if decimal >= 0.5:
-                        crop_region = (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
-                        overlay_list.append(
-                            {
-                                'path': level_number_path,
-                                'position': (
-                                    self._scale(273 + 30, 'x'),
-                                    self._scale(78 - 10, 'y'),
-                                ),
-                                'size': (int(level_plus_width*level_number_time), int(level_plus_height*level_number_time)),
-                                'alpha': 1.0,
-                                'crop': crop_region
-                            }
-                        )
-                else:
-                    pass
-
-                # 成绩
-                position_x = int(result_frame_width * result_frame_time) + self._scale(10, 'x')
-                for index in range(len(str(score))):
-                    digit = int(str(score)[-index-1])
-                    if index % 3 == 0 and index != 0:
-                        position_x -= self._scale(75 * 0.65, 'x')
-                        overlay_list.append(
-                            {
-                                'path': result_comma_path,
-                                'position': (
-                                    position_x,
-                                    result_frame_height//2 + self._scale(19 + 37, 'y')
-                                ),
-                                'size': (int(result_comma_width * result_single_time), int(result_comma_height * result_single_time)),
-                                'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                            }
-                        )
-                        position_x -= self._scale(65 * 0.65, 'x')
-                    else:
-                        position_x -= self._scale(90 * 0.65, 'x')
-                    overlay_list.append(
-                        {
-                            'path': result_num_path,
-                            'position': (
-                                position_x,
-                                int(result_frame_height * result_frame_time) // 2 + self._scale(19, 'y')
-                            ),
-                            'size': (int(result_num_width[digit] * result_single_time), int(result_num_height * result_single_time)),
-                            'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                        }
-                    )
-                tk_left_picture = self.overlay_image(
-                    base_image_path=result_frame_path,
-                    img_overlay_list=overlay_list,
-                    text_overlay_list=[
-                        {
-                            'text': music_name,
-                            'position': (
-                                self._scale(245, 'x'),
-                                self._scale(20, 'y')
-                            ),
-                            'font_size': title_font_size0,
-                            'color': (255, 255, 255),
-                            'anchor': 'lm'
-                        },
-                    ],
-                    target_size=(int(result_frame_width*result_frame_time), int(result_frame_height*result_frame_time))
-                )
-                if tk_left_picture:
-                    self.canvas.create_image(
-                        canvas_width // 2 + self._scale(position_in_canvas, 'x'),
-                        canvas_height // 2 + self._scale(150 + 135 * (Index % 3), 'y'),
-                        image=tk_left_picture,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_left_picture)
-        elif data['music_number'] == '4':
-            #比赛进程
-            tk_new_overlay0 = self.overlay_image(
-                base_image_path=kop_frame_path,
-                img_overlay_list=[],
-                text_overlay_list=[
-                    {
-                        'text': process_text,
-                        'position': (
-                            kop_frame_width // 2,
-                            kop_frame_height // 2
-                        ),
-                        'font_size': kop_font_size,
-                        'font_path': kop_font_path,
-                        'anchor': 'mm',
-                        'color': (255, 255, 255)
-                    }
-                ],
-                target_size=(kop_frame_width, kop_frame_height)
-            )
-            if tk_new_overlay0:
-                self.canvas.create_image(
-                    canvas_width // 2,
-                    self._scale(95, 'y'),  # 位置
-                    image=tk_new_overlay0,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay0)
-
-            # 大框大小
-            new_width = self._scale(890, 'x')  # 指定大小
-            new_height = self._scale(860, 'y')
-            gray_overlay = Image.new('RGBA', (new_width - self._scale(20, 'x'), self._scale(542, 'y')), (30, 44, 60, 255))  # 靛青色长方形
-            
-            # 分数
-            try:
-                track1_score1 = max(0, min(1010000, int(data['track1_1p_score'])))
-            except (ValueError, TypeError):
-                track1_score1 = 0
-            try:
-                track2_score1 = max(0, min(1010000, int(data['track2_1p_score'])))
-            except (ValueError, TypeError):
-                track2_score1 = 0
-            try:
-                track3_score1 = max(0, min(1010000, int(data['track3_1p_score'])))
-            except (ValueError, TypeError):
-                track3_score1 = 0
-            try:
-                track4_score1 = max(0, min(1010000, int(data['track4_1p_score'])))
-            except (ValueError, TypeError):
-                track4_score1 = 0
-            total_score1 = track1_score1 + track2_score1 + track3_score1 + track4_score1
-
-            try:
-                track1_score2 = max(0, min(1010000, int(data['track1_2p_score'])))
-            except (ValueError, TypeError):
-                track1_score2 = 0
-            try:
-                track2_score2 = max(0, min(1010000, int(data['track2_2p_score'])))
-            except (ValueError, TypeError):
-                track2_score2 = 0
-            try:
-                track3_score2 = max(0, min(1010000, int(data['track3_2p_score'])))
-            except (ValueError, TypeError):
-                track3_score2 = 0
-            try:
-                track4_score2 = max(0, min(1010000, int(data['track4_2p_score'])))
-            except (ValueError, TypeError):
-                track4_score2 = 0
-            total_score2 = track1_score2 + track2_score2 + track3_score2 + track4_score2
-
-            # 左侧框
-            if total_score1 >= total_score2:
-                rank_path = rank1_path
-            else:
-                rank_path = rank2_path
-            overlay_list1 = [
-                {'image': gray_overlay, 'position': (new_width//2, new_height//2 + self._scale(150, 'y')), 'anchor': 'center'},
-                {
-                    'path': team_frame_path, # 队伍框
-                    'size': (team_frame_width, team_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(28, 'y')
-                    )
-                },
-                {
-                    'path': total_score_path, # 总成绩图标
-                    'size': (total_score_width, total_score_height),
-                    'position': (
-                        self._scale(215, 'x'),
-                        self._scale(207 - 70, 'y')
-                    ),
-                    'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
-                },
-                {
-                    'path': rank_path, # 排名
-                    'size': (rank_width, rank_height),
-                    'position': (
-                        self._scale(900, 'x'),
-                        self._scale(173 - 70, 'y')
-                    )
-                }
-            ]
-            position_x = new_width - self._scale(40, 'x')
-            for index in range(len(str(total_score1))):
-                digit = int(str(total_score1)[-index-1])
-                if index % 3 == 0 and index != 0:
-                    position_x -= self._scale(75, 'x')
-                    overlay_list1.append(
-                        {
-                            'path': result_comma_path,
-                            'position': (
-                                position_x,
-                                new_height//2 - self._scale(100 - 38 + 96, 'y')
-                            ),
-                            'size': (int(result_comma_width * result_total_time), int(result_comma_height * result_total_time)),
-                            'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                        }
-                    )
-                    position_x -= self._scale(65, 'x')
-                else:
-                    position_x -= self._scale(90, 'x')
-                overlay_list1.append(
-                    {
-                        'path': result_num_path,
-                        'position': (
-                            position_x,
-                            new_height//2 - self._scale(100 + 96, 'y')
-                        ),
-                        'size': (int(result_num_width[digit] * result_total_time), int(result_num_height * result_total_time)),
-                        'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                    }
-                )
-            tk_new_overlay1 = self.overlay_image(
-                base_image_path=None,
-                img_overlay_list=overlay_list1,
-                text_overlay_list=[
-                    {
-                        'text': data['team1'], # 队名
-                        'position': (
-                            self._scale(200, 'x'),
-                            self._scale(45, 'y')
-                        ),
-                        'font_size': team_font_size,
-                        'font_path': team_font_path,
-                        'anchor': 'lm',
-                        'color': (255, 255, 255)
-                    },
-                ],
-                target_size=(new_width, new_height),
-                base_color=(254, 254, 228, 255)  # 淡黄色
-            )
-            if tk_new_overlay1:
-                self.canvas.create_image(
-                    canvas_width // 2 - self._scale(460, 'x'),
-                    canvas_height // 2 + self._scale(80, 'y'),  # 位置
-                    image=tk_new_overlay1,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay1)
-
-            # 右侧框
-            if total_score2 >= total_score1:
-                rank_path = rank1_path
-            else:
-                rank_path = rank2_path
-            overlay_list2 = [
-                {'image': gray_overlay, 'position': (new_width//2, new_height//2 + self._scale(150, 'y')), 'anchor': 'center'},
-                {
-                    'path': team_frame_path, # 队伍框
-                    'size': (team_frame_width, team_frame_height),
-                    'position': (
-                        new_width // 2,
-                        self._scale(28, 'y')
-                    )
-                },
-                {
-                    'path': total_score_path, # 总成绩图标
-                    'size': (total_score_width, total_score_height),
-                    'position': (
-                        self._scale(215, 'x'),
-                        self._scale(207 - 70, 'y')
-                    ),
-                    'crop': (total_score_left, total_score_top, total_score_right, total_score_bottom)
-                },
-                {
-                    'path': rank_path, # 排名
-                    'size': (rank_width, rank_height),
-                    'position': (
-                        self._scale(900, 'x'),
-                        self._scale(173 - 70, 'y')
-                    )
-                }
-            ]
-            position_x = new_width - self._scale(40, 'x')
-            for index in range(len(str(total_score2))):
-                digit = int(str(total_score2)[-index-1])
-                if index % 3 == 0 and index != 0:
-                    position_x -= self._scale(75, 'x')
-                    overlay_list2.append(
-                        {
-                            'path': result_comma_path,
-                            'position': (
-                                position_x,
-                                new_height//2 - self._scale(100 - 38 + 96, 'y')
-                            ),
-                            'size': (int(result_comma_width * result_total_time), int(result_comma_height * result_total_time)),
-                            'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                        }
-                    )
-                    position_x -= self._scale(65, 'x')
-                else:
-                    position_x -= self._scale(90, 'x')
-                overlay_list2.append(
-                    {
-                        'path': result_num_path,
-                        'position': (
-                            position_x,
-                            new_height//2 - self._scale(100 + 96, 'y')
-                        ),
-                        'size': (int(result_num_width[digit] * result_total_time), int(result_num_height * result_total_time)),
-                        'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
+                        'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
+                        'alpha': 1.0,
+                        'crop': crop_region
                     }
                 )
-            tk_new_overlay2 = self.overlay_image(
-                base_image_path=None,
-                img_overlay_list=overlay_list2,
-                text_overlay_list=[
-                    {
-                        'text': data['team2'], # 队名
-                        'position': (
-                            self._scale(200, 'x'),
-                            self._scale(45, 'y')
-                        ),
-                        'font_size': team_font_size,
-                        'font_path': team_font_path,
-                        'anchor': 'lm',
-                        'color': (255, 255, 255)
-                    },
-                ],
-                target_size=(new_width, new_height),
-                base_color=(254, 254, 228, 255)  # 淡黄色
-            )
-            if tk_new_overlay2:
-                self.canvas.create_image(
-                    canvas_width // 2 + self._scale(460, 'x'),
-                    canvas_height // 2 + self._scale(80, 'y'),  # 位置
-                    image=tk_new_overlay2,
-                    anchor=tk.CENTER
-                )
-                self.image_references.append(tk_new_overlay2)
-
-            # 各个单曲成绩
-            for Index in range(8):
-                if Index == 0:
-                    score = track1_score1
-                elif Index == 1:
-                    score = track2_score1
-                elif Index == 2:
-                    score = track3_score1
-                elif Index == 3:
-                    score = track4_score1
-                elif Index == 4:
-                    score = track1_score2
-                elif Index == 5:
-                    score = track2_score2
-                elif Index == 6:
-                    score = track3_score2
-                elif Index == 7:
-                    score = track4_score2
-                if Index < 4:
-                    position_in_canvas = -460
-                elif Index >= 4:
-                    position_in_canvas = 460
-                if Index % 4 == 0:
-                    music_name = music1_name
-                    const = music1_const
-                    jacket_path = jacket1_path
-                elif Index % 4 == 1:
-                    music_name = music2_name
-                    const = music2_const
-                    jacket_path = jacket2_path
-                elif Index % 4 == 2:
-                    music_name = music3_name
-                    const = music3_const
-                    jacket_path = jacket3_path
-                elif Index % 4 == 3:
-                    music_name = music4_name
-                    const = music4_const
-                    jacket_path = jacket4_path
-
-                overlay_list = [
-                    {
-                        'path': track_path, # Track
-                        'position': (
-                            self._scale(61, 'x'),
-                            int(result_frame_height * result_frame_time) // 2
-                        ),
-                        'size': (track_width[Index % 4], track_height),
-                        'crop': (track_left[Index % 4], track_top, track_right[Index % 4], track_bottom)
-                    },
-                    {
-                        'path': jacket_path, # 曲绘
-                        'position': (
-                            self._scale(174, 'x'),
-                            int(result_frame_height * result_frame_time) // 2
-                        ),
-                        'size': (jacket_width, jacket_height),
-                    },
-                    {
-                        'path': level_frame_path, # 等级框
-                        'position': (
-                            self._scale(273, 'x'),
-                            self._scale(78, 'y'),
-                        ),
-                        'size': (level_frame_width, level_frame_height),
-                        'crop': (level_frame_left, level_frame_top, level_frame_right, level_frame_bottom)
-                    }
-                ]
-
-                # 等级
-                if const < 10:
-                    pass # 应该不会打小于10级的歌吧，我是懒狗不做了
-                elif const <100:
-                    number1 = int(const) // 10
-                    number2 = int(const) % 10
-                    decimal = const - int(const)
-                    crop_region = (level_number_left[number1], level_number_top, level_number_right[number1], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number1] - level_number_left[number1], 'x')
-                    overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                self._scale(273 - 18, 'x'),
-                                self._scale(88, 'y'),
-                            ),
-                            'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    crop_region = (level_number_left[number2], level_number_top, level_number_right[number2], level_number_bottom)
-                    level_number_width = self._scale(level_number_right[number2] - level_number_left[number2], 'x')
-                    overlay_list.append(
-                        {
-                            'path': level_number_path,
-                            'position': (
-                                self._scale(273 + 12, 'x'),
-                                self._scale(88, 'y'),
-                            ),
-                            'size': (int(level_number_width*level_number_time), int(level_number_height*level_number_time)),
-                            'alpha': 1.0,
-                            'crop': crop_region
-                        }
-                    )
-                    if decimal >= 0.5:
-                        crop_region = (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
-                        overlay_list.append(
-                            {
-                                'path': level_number_path,
-                                'position': (
-                                    self._scale(273 + 30, 'x'),
-                                    self._scale(78 - 10, 'y'),
-                                ),
-                                'size': (int(level_plus_width*level_number_time), int(level_plus_height*level_number_time)),
-                                'alpha': 1.0,
-                                'crop': crop_region
-                            }
-                        )
-                else:
-                    pass
 
-                # 成绩
-                position_x = int(result_frame_width * result_frame_time) + self._scale(10, 'x')
-                for index in range(len(str(score))):
-                    digit = int(str(score)[-index-1])
-                    if index % 3 == 0 and index != 0:
-                        position_x -= self._scale(75 * 0.65, 'x')
-                        overlay_list.append(
-                            {
-                                'path': result_comma_path,
-                                'position': (
-                                    position_x,
-                                    result_frame_height//2 + self._scale(19 + 37, 'y')
-                                ),
-                                'size': (int(result_comma_width * result_single_time), int(result_comma_height * result_single_time)),
-                                'crop': (result_comma_left, result_comma_top, result_comma_right, result_comma_bottom)
-                            }
-                        )
-                        position_x -= self._scale(65 * 0.65, 'x')
-                    else:
-                        position_x -= self._scale(90 * 0.65, 'x')
-                    overlay_list.append(
-                        {
-                            'path': result_num_path,
-                            'position': (
-                                position_x,
-                                int(result_frame_height * result_frame_time) // 2 + self._scale(19, 'y')
-                            ),
-                            'size': (int(result_num_width[digit] * result_single_time), int(result_num_height * result_single_time)),
-                            'crop': (result_num_left[digit], result_num_top, result_num_right[digit], result_num_bottom)
-                        }
-                    )
-                tk_left_picture = self.overlay_image(
-                    base_image_path=result_frame_path,
-                    img_overlay_list=overlay_list,
-                    text_overlay_list=[
-                        {
-                            'text': music_name,
-                            'position': (
-                                self._scale(245, 'x'),
-                                self._scale(20, 'y')
-                            ),
-                            'font_size': title_font_size0,
-                            'color': (255, 255, 255),
-                            'anchor': 'lm'
-                        },
-                    ],
-                    target_size=(int(result_frame_width*result_frame_time), int(result_frame_height*result_frame_time))
-                )
-                if tk_left_picture:
-                    self.canvas.create_image(
-                        canvas_width // 2 + self._scale(position_in_canvas, 'x'),
-                        canvas_height // 2 + self._scale(30 + 133 * (Index % 4), 'y'),
-                        image=tk_left_picture,
-                        anchor=tk.CENTER
-                    )
-                    self.image_references.append(tk_left_picture)
+        track_frame = {
+            'path': result_frame_path,
+            'size': (frame_width, frame_height),
+            'y': [self._scale(layout['track_y'] + layout['track_pitch'] * track, 'y') for track in range(track_count)],
+            'overlays': track_overlays,
+            'jacket': {
+                'position': (
+                    self._scale(174, 'x'),
+                    frame_height // 2
+                ),
+                'size': (jacket_width, jacket_height),
+            },
+            'level_frame': {
+                'path': level_frame_path,
+                'position': (
+                    self._scale(273, 'x'),
+                    self._scale(78, 'y'),
+                ),
+                'size': (level_frame_width, level_frame_height),
+                'crop': (level_frame_left, level_frame_top, level_frame_right, level_frame_bottom)
+            },
+            'level_tens': level_tens,
+            'level_ones': level_ones,
+            'level_plus': {
+                'path': level_number_path,
+                'position': (
+                    self._scale(273 + 30, 'x'),
+                    self._scale(78 - 10, 'y'),
+                ),
+                'size': (int(level_plus_width*level_number_time), int(level_plus_height*level_number_time)),
+                'alpha': 1.0,
+                'crop': (level_plus_left, level_plus_top, level_plus_right, level_plus_bottom)
+            },
+            # 单曲成绩数字：起始x、数字y、逗号y、倍数
+            'score': (
+                frame_width + self._scale(10, 'x'),
+                frame_height // 2 + self._scale(19, 'y'),
+                result_frame_height//2 + self._scale(19 + 37, 'y'),
+                result_single_time
+            ),
+            'name_text': {
+                'position': (
+                    self._scale(245, 'x'),
+                    self._scale(20, 'y')
+                ),
+                'color': (255, 255, 255),
+                'anchor': 'lm'
+            }
+        }
+        return {'kop': kop, 'panel': panel, 'track': track_frame}
 
     def _get_adaptive_font_size(self, text, family, max_width, max_height, initial_size, min_size): # 旧版本，大概率停用
         """计算自适应字体大小，确保文本不超过指定宽度和高度"""
@@ -3190,21 +2193,41 @@ class DisplayWindow:
         """计算自适应字体大小，确保文本不超过指定宽度和高度"""
         size = int(initial_size * self.scale_x)
         min_size = int(min_size * self.scale_x)
-        if font_path == Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf"):
-            font = self.preloaded_fonts.get(size, None)
-        if not font:
-            font = ImageFont.truetype(font_path, size)
-        while (font.getlength(text) > max_width or font.getmetrics()[0] + font.getmetrics()[1] > max_height) and size > min_size:
-            size -= 1
-            font = self.preloaded_fonts.get(size, None)
-            if not font:
-                font = ImageFont.truetype(font_path, size)
-        if (font.getlength(text) > max_width or font.getmetrics()[0] + font.getmetrics()[1] > max_height):
-            tmp_text = text
-            while (font.getlength(tmp_text) > max_width or font.getmetrics()[0] + font.getmetrics()[1] > max_height):
-                text = text[:-1]
-                tmp_text = text + '...'
-            text = text + '...'
+        key = (text, font_path, max_width, max_height, size, min_size)
+        result = self.font_fit_memo.get(key)
+        if result is None:
+            result = self._fit_text(text, font_path, max_width, max_height, size, min_size)
+            self.font_fit_memo[key] = result
+        return result
+
+    def _fit_text(self, text, font_path, max_width, max_height, size, min_size):
+        """二分查找放得下的最大字号，最小字号也放不下时再二分查找截断位置，末尾加“...”"""
+        def fits(font, value):
+            ascent, descent = font.getmetrics()
+            return font.getlength(value) <= max_width and ascent + descent <= max_height
+
+        if size > min_size and not fits(self.font_cache.get(font_path, size), text):
+            # 在[min_size, size)里找最大的放得下的字号，都放不下时用min_size
+            low, high = min_size, size - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if fits(self.font_cache.get(font_path, middle), text):
+                    low = middle
+                else:
+                    high = middle - 1
+            size = low
+
+        font = self.font_cache.get(font_path, size)
+        if not fits(font, text):
+            # 找最长的加上“...”还放得下的前缀
+            low, high = 0, len(text) - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if fits(font, text[:middle] + '...'):
+                    low = middle
+                else:
+                    high = middle - 1
+            text = text[:low] + '...'
         return text, size
 
     def _load_image(self, path, width, height, crop=None, alpha=1.0): # 好像没啥用，感觉可以删了
@@ -3232,24 +2255,45 @@ class DisplayWindow:
         except Exception:
             return None
         
-    def _create_faded_image(self, pil_img, alpha):
-        """创建带透明度的PIL图像"""
-        if pil_img.mode != 'RGBA':
-            pil_img = pil_img.convert('RGBA')
+    def _create_faded_image(self, pil_img, alpha, bands=None):
+        """创建带透明度的PIL图像，bands为提前拆好的(r, g, b, a)通道，同一张图反复淡出时可以复用"""
+        if bands is None:
+            if pil_img.mode != 'RGBA':
+                pil_img = pil_img.convert('RGBA')
+            bands = pil_img.split()
+        r, g, b, a = bands
         
-        # 复制图像
-        img_copy = pil_img.copy()
-        
-        # 分离并修改alpha通道
-        r, g, b, a = img_copy.split()
-        a = a.point(lambda p: int(p * alpha))
+        # 用查找表修改alpha通道
+        a = a.point([int(p * alpha) for p in range(256)])
         
         # 返回新的PIL图像
         return Image.merge('RGBA', (r, g, b, a))
         
+    def _selection_layer(self, name, key, compose):
+        """选曲界面的一层，key为这一层的全部输入，和上次一样时直接返回上次的图片，否则调用compose重新合成"""
+        cached = self.selection_layers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        layer = compose()
+        if layer:
+            self.selection_layers[name] = (key, layer)
+        return layer
+
     def overlay_image(self, base_image_path, img_overlay_list, text_overlay_list, target_size=None, output_img=False, base_color=(255, 255, 255, 255)):
+        """叠加图片并转换为Tkinter图片，参数见compose_image，output_img为True时同时返回PIL图像"""
+        final_img = self.compose_image(base_image_path, img_overlay_list, text_overlay_list, target_size, base_color)
+        if final_img is None:
+            return None
+
+        # 转换为Tkinter图片
+        if output_img:
+            return ImageTk.PhotoImage(final_img),final_img
+        else:
+            return ImageTk.PhotoImage(final_img)
+
+    def compose_image(self, base_image_path, img_overlay_list, text_overlay_list, target_size=None, base_color=(255, 255, 255, 255)):
         """
-        使用PIL直接叠加图片
+        使用PIL直接叠加图片，不创建Tkinter对象，可以在工作线程里调用
         
         Args:
             base_image_path: 底图路径，或None以创建白色底图
@@ -3278,7 +2322,7 @@ class DisplayWindow:
             base_color: 当base_image_path为None时使用的底图颜色，RGBA元组
         
         Returns:
-            ImageTk.PhotoImage 对象
+            PIL Image 对象（RGBA），失败时返回None
         """
         try:
             # 加载底图
@@ -3290,13 +2334,13 @@ class DisplayWindow:
                 else:
                     base_img = Image.new('RGBA', (100, 100), base_color)
             elif self.preloaded.get(base_image_path):
-                base_img = self.preloaded[base_image_path].copy()
+                # 缩放好的底图会被缓存，下面final_img会复制一份再修改
+                base_img = self.sprite_cache.get(base_image_path, size=target_size)
             else:
                 base_img = Image.open(base_image_path).convert('RGBA')
-            
-            # 调整底图大小
-            if target_size and base_image_path is not None:
-                base_img = base_img.resize(target_size, Image.Resampling.LANCZOS)
+                # 调整底图大小
+                if target_size:
+                    base_img = base_img.resize(target_size, Image.Resampling.LANCZOS)
             
             final_img = base_img.copy()
             
@@ -3305,40 +2349,31 @@ class DisplayWindow:
 
             for overlay_info in img_overlay_list:
                 if 'image' in overlay_info:
-                    overlay_img = overlay_info['image']
+                    overlay_img, mask = self._prepare_overlay(overlay_info['image'], overlay_info)
                 elif 'path' in overlay_info:
                     path = overlay_info.get('path')
                     if not path:
                         continue
                         
-                    # 加载覆盖图（考虑缓存）
-                    overlay_img = None
                     if self.preloaded.get(path):
-                        overlay_img = self.preloaded[path].copy()
+                        # 预加载的图集直接从切图缓存取，已经裁剪、缩放并处理好透明度
+                        overlay_img = self.sprite_cache.get(
+                            path,
+                            crop=overlay_info.get('crop'),
+                            size=overlay_info.get('size'),
+                            alpha=overlay_info.get('alpha', 1.0)
+                        )
+                        mask = overlay_img
+                    elif not overlay_info.get('crop'):
+                        # 曲绘等磁盘上的图片从解码缓存取，已经缩放好
+                        overlay_img = self.jacket_cache.get(path, overlay_info.get('size'))
+                        overlay_img, mask = self._prepare_overlay(overlay_img, {'alpha': overlay_info.get('alpha', 1.0)})
                     else:
                         overlay_img = Image.open(path).convert('RGBA')
+                        overlay_img, mask = self._prepare_overlay(overlay_img, overlay_info)
                 else:
                     continue
                 
-                # 裁剪
-                if crop := overlay_info.get('crop'):
-                    overlay_img = overlay_img.crop(crop)
-                
-                # 调整大小
-                if size := overlay_info.get('size'):
-                    overlay_img = overlay_img.resize(size, Image.Resampling.LANCZOS)
-                
-                # 透明度处理 - 优化这个部分
-                alpha = overlay_info.get('alpha', 1.0)
-                if alpha < 1.0:
-                    # 方法1: 使用split和point（比putdata快10倍以上）
-                    r, g, b, a = overlay_img.split()
-                    a = a.point(lambda p: int(p * alpha))
-                    overlay_img = Image.merge('RGBA', (r, g, b, a))
-                    mask = a
-                else:
-                    mask = overlay_img
-                
                 # 计算位置
                 x, y = position = overlay_info.get('position', (0, 0))
                 overlay_width, overlay_height = overlay_img.size
@@ -3376,18 +2411,8 @@ class DisplayWindow:
                 color = text_info.get('color', (0, 0, 0))
                 alpha = text_info.get('alpha', 1.0)
                 # 加载字体
-                if text_info.get('font_path'):
-                    font_path = text_info.get('font_path')
-                    if font_path == Utils().resource_path("assets/fonts/Helvetica Bold.ttf") and font_size == self._scale_font_size(24):
-                        font = self.preloaded_BPM_font
-                    elif font_path == Utils().resource_path("assets/fonts/SourceHanSansSC-Bold-2.otf") and font_size == self._scale_font_size(42):
-                        font = self.preloaded_team_font
-                    elif font_path == Utils().resource_path("assets/fonts/SourceHanSansSC-Medium-2.otf") and font_size == self._scale_font_size(46):
-                        font = self.preloaded_title_font
-                    else:
-                        font = ImageFont.truetype(font_path, font_size)
-                else:
-                    font = self.preloaded_fonts.get(font_size, ImageFont.load_default())
+                font_path = text_info.get('font_path') or Utils().resource_path("assets/fonts/SEGA_MARUGOTHICDB.ttf")
+                font = self.font_cache.get(font_path, font_size)
                 
                 if not text:
                     continue
@@ -3404,17 +2429,33 @@ class DisplayWindow:
                 # 绘制文字
                 draw = ImageDraw.Draw(final_img)
                 draw.text(position, text, font=font, fill=color, anchor=anchor)
-            
-            # 转换为Tkinter图片
-            if output_img:
-                return ImageTk.PhotoImage(final_img),final_img
-            else:
-                return ImageTk.PhotoImage(final_img)
+
+            return final_img
             
         except Exception as e:
             print(f"图片叠加失败: {e}")
             return None
             
+    def _prepare_overlay(self, overlay_img, overlay_info):
+        """按覆盖图信息裁剪、缩放并处理透明度，返回(覆盖图, 蒙版)"""
+        # 裁剪
+        if crop := overlay_info.get('crop'):
+            overlay_img = overlay_img.crop(crop)
+        
+        # 调整大小
+        if size := overlay_info.get('size'):
+            overlay_img = overlay_img.resize(size, Image.Resampling.LANCZOS)
+        
+        # 透明度处理 - 优化这个部分
+        alpha = overlay_info.get('alpha', 1.0)
+        if alpha < 1.0:
+            # 方法1: 使用split和point（比putdata快10倍以上）
+            r, g, b, a = overlay_img.split()
+            a = a.point(lambda p: int(p * alpha))
+            overlay_img = Image.merge('RGBA', (r, g, b, a))
+            return overlay_img, a
+        return overlay_img, overlay_img
+
     def _display_background(self, bg_img):
         """显示背景图片"""
         tk_bg = self.preloaded.get(bg_img)
@@ -3454,8 +2495,10 @@ class DisplayWindow:
         
     def on_closing(self):
         """关闭窗口时的处理"""
+        self.render_pool.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
         
     def close(self):
         """关闭窗口"""
+        self.render_pool.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import threading
+from PIL import ImageFont
+
+
+class FontCache:
+    """字体缓存：按(路径, 大小)在第一次用到时加载
+
+    FreeType字体对象不能在多个线程里同时使用，所以每个线程各有一份缓存。
+    主线程的那份可以由后台线程提前加载，加载好之后后台线程不再使用这些字体。
+    """
+
+    def __init__(self):
+        self.main_fonts = {}
+        self.local = threading.local()
+
+    def _fonts(self):
+        """当前线程的字体缓存"""
+        if threading.current_thread() is threading.main_thread():
+            return self.main_fonts
+        fonts = getattr(self.local, 'fonts', None)
+        if fonts is None:
+            fonts = self.local.fonts = {}
+        return fonts
+
+    def get(self, path, size):
+        """返回指定路径和大小的字体，缓存里没有时加载"""
+        fonts = self._fonts()
+        font = fonts.get((path, size))
+        if font is None:
+            # 后台预热可能同时加载了同一个字体，以先放进去的为准
+            font = fonts.setdefault((path, size), ImageFont.truetype(path, size))
+        return font
+
+    def warm_up(self, keys):
+        """在后台线程里为主线程加载字体，keys为(路径, 大小)列表"""
+        def load():
+            for path, size in keys:
+                if (path, size) in self.main_fonts:
+                    continue
+                try:
+                    self.main_fonts.setdefault((path, size), ImageFont.truetype(path, size))
+                except OSError as e:
+                    print(f"字体预加载失败 {path} ({size}): {e}")
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        return thread
@@ -1,11 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from utils import Utils
-import pandas as pd
+from search_scheduler import SearchScheduler
 import os
+import threading
 
 class GUIWindow:
     """GUI控制窗口"""
+
+    # 选曲下拉框每页显示的搜索结果数量
+    SEARCH_RESULT_LIMIT = 50
+    # 下拉框末尾用来加载下一页的条目
+    LOAD_MORE_TEXT = "…… 加载更多（还有 {} 首）"
+
     def __init__(self, controller):
         self.controller = controller
         self.root = tk.Tk()
@@ -14,6 +21,11 @@ class GUIWindow:
         
         # 防止重复打开
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # 搜索在后台线程进行，按键会防抖
+        self.search_scheduler = SearchScheduler(self.root, Utils().search_index.search_ranked, self._apply_search_result)
+        # 选曲下拉框 -> [搜索内容, 完整结果, 已显示数量]
+        self.search_results = {}
         
         self.setup_ui()
         
@@ -171,11 +183,10 @@ class GUIWindow:
         song_frame_1p.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(song_frame_1p, text="1P选曲: ").pack(side=tk.LEFT)
         self.entry_1p_song = ttk.Combobox(song_frame_1p, 
-                                         values=Utils().searchable_music_list,
                                          state="normal",  # 可输入
                                          width=50)
         self.entry_1p_song.pack(side=tk.LEFT, padx=(0, 10))
-        self.entry_1p_song.bind("<KeyRelease>", self.search_music)
+        self._bind_song_search(self.entry_1p_song)
         
         # 2P队伍和队员名
         frame_2p = ttk.Frame(input_frame)
@@ -204,11 +215,10 @@ class GUIWindow:
         song_frame_2p.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(song_frame_2p, text="2P选曲: ").pack(side=tk.LEFT)
         self.entry_2p_song = ttk.Combobox(song_frame_2p, 
-                                         values=Utils().searchable_music_list,
                                          state="normal",  # 可输入
                                          width=50)
         self.entry_2p_song.pack(side=tk.LEFT, padx=(0, 10))
-        self.entry_2p_song.bind("<KeyRelease>", self.search_music)
+        self._bind_song_search(self.entry_2p_song)
 
         # 随机选曲区域
         random_frame = ttk.LabelFrame(main_frame, text="随机选曲", padding="15")
@@ -233,6 +243,14 @@ class GUIWindow:
         self.entry_random_const_max = ttk.Entry(random_const_frame, width=10)
         self.entry_random_const_max.pack(side=tk.LEFT, padx=(10, 10))
 
+        # 导入进度（先占住底部一行，按钮排在上面）
+        import_status_frame = ttk.Frame(random_frame)
+        import_status_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(15, 0))
+        self.import_status = ttk.Label(import_status_frame, text="", width=30)
+        self.import_status.pack(side=tk.LEFT, padx=(90, 10))
+        self.import_progress = ttk.Progressbar(import_status_frame, orient="horizontal", mode="determinate", maximum=100)
+        self.import_progress.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         # 导入Excel曲库按钮
         self.btn1 = ttk.Button(
             random_frame,
@@ -298,11 +316,10 @@ class GUIWindow:
         track1_frame.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(track1_frame, text="Track 1: ").pack(side=tk.LEFT)
         self.track1_music = ttk.Combobox(track1_frame, 
-                                         values=Utils().searchable_music_list,
                                          state="normal",  # 可输入
                                          width=33)
         self.track1_music.pack(side=tk.LEFT, padx=(0, 10))
-        self.track1_music.bind("<KeyRelease>", self.search_music)
+        self._bind_song_search(self.track1_music)
         ttk.Label(track1_frame, text="1P分数: ").pack(side=tk.LEFT)
         self.track1_1p_score = ttk.Entry(track1_frame, width=10)
         self.track1_1p_score.pack(side=tk.LEFT, padx=(0, 10))
@@ -315,11 +332,10 @@ class GUIWindow:
         track2_frame.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(track2_frame, text="Track 2: ").pack(side=tk.LEFT)
         self.track2_music = ttk.Combobox(track2_frame, 
-                                         values=Utils().searchable_music_list,
                                          state="normal",  # 可输入
                                          width=33)
         self.track2_music.pack(side=tk.LEFT, padx=(0, 10))
-        self.track2_music.bind("<KeyRelease>", self.search_music)
+        self._bind_song_search(self.track2_music)
         ttk.Label(track2_frame, text="1P分数: ").pack(side=tk.LEFT)
         self.track2_1p_score = ttk.Entry(track2_frame, width=10)
         self.track2_1p_score.pack(side=tk.LEFT, padx=(0, 10))
@@ -332,11 +348,10 @@ class GUIWindow:
         track3_frame.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(track3_frame, text="Track 3: ").pack(side=tk.LEFT)
         self.track3_music = ttk.Combobox(track3_frame, 
-                                         values=Utils().searchable_music_list,
                                          state="normal",  # 可输入
                                          width=33)
         self.track3_music.pack(side=tk.LEFT, padx=(0, 10))
-        self.track3_music.bind("<KeyRelease>", self.search_music)
+        self._bind_song_search(self.track3_music)
         ttk.Label(track3_frame, text="1P分数: ").pack(side=tk.LEFT)
         self.track3_1p_score = ttk.Entry(track3_frame, width=10)
         self.track3_1p_score.pack(side=tk.LEFT, padx=(0, 10))
@@ -349,11 +364,10 @@ class GUIWindow:
         track4_frame.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(track4_frame, text="Track 4: ").pack(side=tk.LEFT)
         self.track4_music = ttk.Combobox(track4_frame, 
-                                         values=Utils().searchable_music_list,
                                          state="normal",  # 可输入
                                          width=33)
         self.track4_music.pack(side=tk.LEFT, padx=(0, 10))
-        self.track4_music.bind("<KeyRelease>", self.search_music)
+        self._bind_song_search(self.track4_music)
         ttk.Label(track4_frame, text="1P分数: ").pack(side=tk.LEFT)
         self.track4_1p_score = ttk.Entry(track4_frame, width=10)
         self.track4_1p_score.pack(side=tk.LEFT, padx=(0, 10))
@@ -366,22 +380,68 @@ class GUIWindow:
         combo = event.widget
         value = combo.get()
         #print(f"搜索内容: {value}")
-        
-        data = [None]
-        if value == '':
-            combo['values'] = Utils().searchable_music_list
-        else:
-            data = []
-            for item in Utils().searchable_music_list:
-                if value.lower() in item.lower():
-                    data.append(item)
-            
-            combo['values'] = data
+
+        # 回车要立刻展开下拉框，不做防抖
+        self.search_scheduler.schedule(combo, value, context=(event.keysym, value), immediate=event.keysym == 'Return')
+
+    def _bind_song_search(self, combo):
+        """给选曲下拉框绑定搜索，并显示第一页全曲列表"""
+        combo.bind("<KeyRelease>", self.search_music)
+        combo.bind("<<ComboboxSelected>>", self._on_song_selected)
+        self._set_search_results(combo, '', Utils().searchable_music_list)
+
+    def _apply_search_result(self, combo, data, context):
+        """搜索结果回到Tk线程后更新下拉列表"""
+        keysym, value = context
+        self._set_search_results(combo, value, data)
 
         current_index = combo.current()
         if current_index == -1 and data:
-            if event.keysym == 'Return':
+            if keysym == 'Return':
                 combo.event_generate('<Down>')
+
+    def _set_search_results(self, combo, value, data):
+        """保存完整的搜索结果，下拉框里只放第一页"""
+        self.search_results[combo] = [value, data, 0]
+        self._show_more_results(combo)
+
+    def _show_more_results(self, combo):
+        """下拉框再多显示一页结果，后面还有结果时在末尾加“加载更多”"""
+        value, data, shown = self.search_results[combo]
+        shown = min(len(data), shown + self.SEARCH_RESULT_LIMIT)
+        self.search_results[combo][2] = shown
+        values = data[:shown]
+        if shown < len(data):
+            values = values + [self.LOAD_MORE_TEXT.format(len(data) - shown)]
+        combo['values'] = values
+
+    def _on_song_selected(self, event):
+        """选中曲目时提前准备曲绘，选中“加载更多”时加载下一页，并恢复原来的输入"""
+        combo = event.widget
+        value, data, shown = self.search_results.get(combo, ('', [], 0))
+        if combo.current() != shown or shown >= len(data):
+            self.controller.prefetch_music(combo.get())
+            return
+        self._show_more_results(combo)
+        combo.set(value)
+        combo.icursor(tk.END)
+        # 等下拉框收起后再重新展开，并定位到新加载的第一条
+        def reopen():
+            combo.event_generate('<Down>')
+            self._see_result(combo, shown)
+        self.root.after_idle(reopen)
+
+    def _see_result(self, combo, index):
+        """在展开的下拉列表里定位到第index条"""
+        try:
+            popdown = combo.tk.call('ttk::combobox::PopdownWindow', combo)
+            listbox = f'{popdown}.f.l'
+            combo.tk.call(listbox, 'see', index)
+            combo.tk.call(listbox, 'selection', 'clear', 0, 'end')
+            combo.tk.call(listbox, 'selection', 'set', index)
+            combo.tk.call(listbox, 'activate', index)
+        except tk.TclError:
+            pass
         
     def clear_screen(self):
         """清空屏幕"""
@@ -435,28 +495,7 @@ class GUIWindow:
         )
         
         if file_path:
-            try:
-                filename = os.path.splitext(os.path.basename(file_path))[0]
-                df = pd.read_excel(file_path, header=None)
-                id_list = []
-                util = Utils()
-                for i in range(len(df)):
-                    for j in range (len(df.columns)):
-                        content = str(df.iloc[i, j]).strip()
-                        for key, value in util.music_list.items():
-                            if content == key or content == value['Name']:
-                                id_list.append(key)
-                id_list = list(dict.fromkeys(id_list))
-                if id_list == []:
-                    messagebox.showerror("导入失败", "你的Excel文档里找不到曲目")
-                    return
-                music_list = {music_id: util.music_list[music_id] for music_id in id_list}
-                util.add_music_list(filename, music_list)
-                self.entry_library['values']=["全曲库"] + list(Utils().users_music_list.keys())
-                messagebox.showinfo("导入成功", f"你成功导入了名为“{filename}”的曲库")
-                
-            except Exception as e:
-                messagebox.showerror("导入错误", f"导入Excel文件失败:\n{str(e)}")
+            self._start_import(file_path, "Excel", self._read_excel_contents)
     
     def import_txt(self):
         """导入TXT文件"""
@@ -466,28 +505,78 @@ class GUIWindow:
         )
         
         if file_path:
+            self._start_import(file_path, "TXT", self._read_txt_contents)
+
+    @staticmethod
+    def _read_excel_contents(file_path):
+        """读取Excel里的所有单元格"""
+        import pandas as pd # 启动时已在后台导入，这里不会再等
+        df = pd.read_excel(file_path, header=None)
+        # 按行展开所有单元格，顺序和逐行逐列读取一致
+        return df.to_numpy().ravel()
+
+    @staticmethod
+    def _read_txt_contents(file_path):
+        """读取TXT里的所有行"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.readlines()
+
+    def _start_import(self, file_path, file_type, reader):
+        """在后台线程导入曲库，界面和显示窗口不会卡住"""
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        if Utils().is_music_list_up_to_date(filename, file_path):
+            messagebox.showinfo("导入成功", f"曲库“{filename}”没有变化，无需重新导入")
+            return
+        self.btn1.state(['disabled'])
+        self.btn2.state(['disabled'])
+        self.import_status.config(text=f"正在读取“{filename}”…")
+        self.import_progress.config(mode="indeterminate")
+        self.import_progress.start(15)
+
+        def report_progress(done, total):
+            self.root.after(0, self._update_import_progress, done, total)
+
+        def work():
             try:
-                id_list = []
-                util = Utils()
-                filename = os.path.splitext(os.path.basename(file_path))[0]
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    lines = file.readlines()
-                    for line in lines:
-                        content = line.strip()
-                        for key, value in util.music_list.items():
-                            if content == key or content == value['Name']:
-                                id_list.append(key)
-                id_list = list(dict.fromkeys(id_list))
-                if id_list == []:
-                    messagebox.showerror("导入失败", "你的TXT文档里找不到曲目")
-                    return
-                music_list = {music_id: util.music_list[music_id] for music_id in id_list}
-                util.add_music_list(filename, music_list)
-                self.entry_library['values']=["全曲库"] + list(Utils().users_music_list.keys())
-                messagebox.showinfo("导入成功", f"你成功导入了名为“{filename}”的曲库")
-                
+                # 先记下签名再读取，读取期间文件被改了下次也会重新导入
+                source = Utils().get_file_signature(file_path)
+                contents = reader(file_path)
+                self.root.after(0, self._update_import_progress, 0, len(contents))
+                id_list = Utils().match_music_ids(contents, progress=report_progress)
+                self.root.after(0, self._finish_import, filename, file_type, id_list, source, None)
             except Exception as e:
-                messagebox.showerror("导入错误", f"导入TXT文件失败:\n{str(e)}")
+                self.root.after(0, self._finish_import, filename, file_type, None, None, e)
+
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+
+    def _update_import_progress(self, done, total):
+        """更新导入进度条"""
+        if str(self.import_progress['mode']) != "determinate":
+            self.import_progress.stop()
+            self.import_progress.config(mode="determinate")
+        self.import_progress['value'] = done * 100 / total if total else 100
+        self.import_status.config(text=f"正在匹配曲目 {done}/{total}")
+
+    def _finish_import(self, filename, file_type, id_list, source, error):
+        """导入结束后在Tk线程里更新曲库列表并提示结果"""
+        self.import_progress.stop()
+        self.import_progress.config(mode="determinate", value=0)
+        self.import_status.config(text="")
+        self.btn1.state(['!disabled'])
+        self.btn2.state(['!disabled'])
+
+        if error is not None:
+            messagebox.showerror("导入错误", f"导入{file_type}文件失败:\n{str(error)}")
+            return
+        if id_list == []:
+            messagebox.showerror("导入失败", f"你的{file_type}文档里找不到曲目")
+            return
+        util = Utils()
+        music_list = {music_id: util.music_list[music_id] for music_id in id_list}
+        util.add_music_list(filename, music_list, source=source)
+        self.entry_library['values']=["全曲库"] + list(Utils().users_music_list.keys())
+        messagebox.showinfo("导入成功", f"你成功导入了名为“{filename}”的曲库")
         
     def on_closing(self):
         """关闭窗口时的处理"""
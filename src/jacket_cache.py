@@ -0,0 +1,278 @@
+import os, sys
+import argparse
+import json
+import mmap
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+
+def jacket_sizes(window_size):
+    """当前分辨率下曲绘会用到的大小：选曲卡片、比赛结果，要和display_window里的计算保持一致"""
+    width, height = window_size
+    scale_x = width / 1920.0
+    scale_y = height / 1080.0
+    # 选曲卡片：300 * image_time(1.4)，先缩放再乘
+    card_size = (int(int(300 * scale_x) * 1.4), int(int(300 * scale_y) * 1.4))
+    # 比赛结果：83 * image_time(1.3)，先乘再缩放
+    result_size = (int(83 * 1.3 * scale_x), int(83 * 1.3 * scale_y))
+    return [card_size, result_size]
+
+# 曲绘图集索引格式版本
+JACKET_ATLAS_VERSION = 1
+
+def jacket_name(path):
+    """曲绘文件名（不含扩展名），由曲目ID决定，用作转码文件名和图集索引"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class JacketAtlas:
+    """曲绘图集：同一大小的全部曲绘按原始RGBA数据连续存在一个文件里，用mmap读取，由系统决定哪些页留在内存"""
+
+    def __init__(self, atlas_path, index_path):
+        with open(index_path, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        if index.get('version') != JACKET_ATLAS_VERSION:
+            raise ValueError(f"曲绘图集版本不对: {index.get('version')}")
+        self.size = tuple(index['size'])
+        self.frame_bytes = self.size[0] * self.size[1] * 4
+        # 曲绘文件名 -> [偏移, 源文件mtime]
+        self.entries = index['entries']
+        with open(atlas_path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get(self, name, mtime_ns):
+        """返回直接引用图集内存的只读图像，不在图集里或者源文件改过时返回None"""
+        entry = self.entries.get(name)
+        if entry is None or entry[1] != mtime_ns:
+            return None
+        offset = entry[0]
+        if offset + self.frame_bytes > len(self.buffer):
+            return None
+        view = memoryview(self.buffer)[offset:offset + self.frame_bytes]
+        return Image.frombuffer('RGBA', self.size, view, 'raw', 'RGBA', 0, 1)
+
+    @staticmethod
+    def build(atlas_path, index_path, size, items):
+        """把(曲绘文件名, 源文件mtime, 图像)依次写进图集，返回写入的数量"""
+        entries = {}
+        tmp_path = atlas_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            for name, mtime_ns, jacket in items:
+                entries[name] = [file.tell(), mtime_ns]
+                file.write(jacket.tobytes())
+        os.replace(tmp_path, atlas_path)
+        index = {'version': JACKET_ATLAS_VERSION, 'size': list(size), 'entries': entries}
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(index, file, separators=(',', ':'))
+        os.replace(index_path + '.tmp', index_path)
+        return len(entries)
+
+
+class JacketCache:
+    """曲绘缓存：按(路径, 大小)缓存解码并缩放好的RGBA图片，按占用内存淘汰最久没用的
+
+    指定disk_dir时，缩放好的曲绘还会以原始RGBA数据存到磁盘（每个大小一个目录），
+    文件的mtime和源DDS一致才使用，之后读取不需要再解码DDS和缩放；
+    disk_dir里有打包好的图集（<宽>x<高>.atlas）时优先从图集取，不用打开单独的文件
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, use_atlas=True):
+        """
+        Args:
+            max_bytes: 缓存图片占用的最大内存（按RGBA每像素4字节计算）
+            disk_dir: 转码后曲绘的存放目录，None表示不存到磁盘
+            use_atlas: 是否读取打包好的图集，打包图集时要关掉，否则会占用旧的图集文件
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.use_atlas = use_atlas and disk_dir is not None
+        # 大小 -> JacketAtlas，没有图集时为None
+        self.atlases = {}
+        self.total_bytes = 0
+        self.jackets = OrderedDict()
+        # 预读在线程池里进行，和合成卡片的线程同时读写缓存
+        self.lock = threading.Lock()
+
+    def get(self, path, size=None):
+        """返回解码（并缩放）好的曲绘，调用方不能修改返回的图片"""
+        return self.load(path, [size])[0]
+
+    def load(self, path, sizes):
+        """一次取出同一张曲绘的多个大小，缓存里没有的只解码一次"""
+        results = []
+        missing = []
+        with self.lock:
+            for size in sizes:
+                key = (path, tuple(size) if size else None)
+                jacket = self.jackets.get(key)
+                if jacket is not None:
+                    self.jackets.move_to_end(key)
+                else:
+                    missing.append(len(results))
+                results.append(jacket)
+        if not missing:
+            return results
+
+        # 在锁外解码，DDS解码比较慢，磁盘上有转码好的就不用解码
+        source = None
+        for position in missing:
+            size = sizes[position]
+            jacket = self._load_from_atlas(path, size)
+            if jacket is None:
+                jacket = self._load_transcoded(path, size)
+            if jacket is None:
+                if source is None:
+                    source = Image.open(path).convert('RGBA')
+                jacket = source.resize(size, Image.Resampling.LANCZOS) if size else source
+                self._save_transcoded(path, size, jacket)
+            results[position] = jacket
+            self._store((path, tuple(size) if size else None), jacket)
+        return results
+
+    def atlas_paths(self, size):
+        """(图集文件, 索引文件)的路径"""
+        base = os.path.join(self.disk_dir, f'{size[0]}x{size[1]}')
+        return base + '.atlas', base + '.json'
+
+    def _get_atlas(self, size):
+        size = tuple(size)
+        with self.lock:
+            if size not in self.atlases:
+                try:
+                    self.atlases[size] = JacketAtlas(*self.atlas_paths(size))
+                except (OSError, ValueError, KeyError, TypeError):
+                    # 没有打包图集
+                    self.atlases[size] = None
+            return self.atlases[size]
+
+    def _load_from_atlas(self, path, size):
+        if not self.use_atlas or not size:
+            return None
+        atlas = self._get_atlas(size)
+        if atlas is None or atlas.size != tuple(size):
+            return None
+        try:
+            return atlas.get(jacket_name(path), os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+
+    def _transcoded_path(self, path, size):
+        if self.disk_dir is None or not size:
+            return None
+        return os.path.join(self.disk_dir, f'{size[0]}x{size[1]}', jacket_name(path) + '.rgba')
+
+    def _load_transcoded(self, path, size):
+        """读取磁盘上转码好的曲绘，不存在或者源文件改过时返回None"""
+        transcoded_path = self._transcoded_path(path, size)
+        if transcoded_path is None:
+            return None
+        try:
+            if os.stat(transcoded_path).st_mtime_ns != os.stat(path).st_mtime_ns:
+                return None
+            with open(transcoded_path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+        if len(data) != size[0] * size[1] * 4:
+            return None
+        return Image.frombytes('RGBA', tuple(size), data)
+
+    def _save_transcoded(self, path, size, jacket):
+        """把缩放好的曲绘存到磁盘，mtime设成和源文件一样，写入失败不影响正常使用"""
+        transcoded_path = self._transcoded_path(path, size)
+        if transcoded_path is None:
+            return
+        try:
+            stat = os.stat(path)
+            os.makedirs(os.path.dirname(transcoded_path), exist_ok=True)
+            # 多个线程可能同时转码同一张曲绘，临时文件名要区分
+            tmp_path = f'{transcoded_path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as file:
+                file.write(jacket.tobytes())
+            os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp_path, transcoded_path)
+        except OSError as e:
+            print(f"曲绘缓存写入失败: {e}")
+
+    def is_transcoded(self, path, size):
+        """磁盘上已经有这个大小的有效转码"""
+        transcoded_path = self._transcoded_path(path, size)
+        try:
+            return transcoded_path is not None and os.stat(transcoded_path).st_mtime_ns == os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+
+    def _store(self, key, jacket):
+        with self.lock:
+            if key in self.jackets:
+                return
+            self.jackets[key] = jacket
+            self.total_bytes += jacket.width * jacket.height * 4
+            while self.total_bytes > self.max_bytes and len(self.jackets) > 1:
+                _, old = self.jackets.popitem(last=False)
+                self.total_bytes -= old.width * old.height * 4
+
+    def clear(self):
+        with self.lock:
+            self.jackets.clear()
+            self.total_bytes = 0
+
+
+def main(argv=None):
+    """批量转码全曲库的曲绘：python src/jacket_cache.py 1920x1080 [1280x720 ...] [--atlas]"""
+    parser = argparse.ArgumentParser(description="把全曲库的曲绘按输出分辨率转码到缓存目录")
+    parser.add_argument('sizes', nargs='+', help="输出窗口大小，例如 1920x1080")
+    parser.add_argument('--force', action='store_true', help="已经转码过的也重新转码")
+    parser.add_argument('--atlas', action='store_true', help="打包成每个大小一个的图集文件，而不是每张曲绘一个文件")
+    args = parser.parse_args(argv)
+
+    from utils import Utils
+    jacket_cache = JacketCache(max_bytes=0, disk_dir=Utils().cache_path('jackets'), use_atlas=False)
+    paths = sorted({music['Jacket'] for music in Utils().music_list.values()})
+    if args.atlas:
+        build_atlases(jacket_cache, paths, args.sizes)
+        return
+    for window_size in args.sizes:
+        sizes = jacket_sizes(tuple(int(value) for value in window_size.lower().split('x')))
+        done = skipped = failed = 0
+        for path in paths:
+            if not os.path.exists(path):
+                skipped += 1
+                continue
+            if not args.force and all(jacket_cache.is_transcoded(path, size) for size in sizes):
+                skipped += 1
+                continue
+            try:
+                source = Image.open(path).convert('RGBA')
+                for size in sizes:
+                    jacket_cache._save_transcoded(path, size, source.resize(size, Image.Resampling.LANCZOS))
+                done += 1
+            except OSError as e:
+                print(f"{path} 转码失败: {e}")
+                failed += 1
+        print(f"{window_size}: 转码 {done} 张，跳过 {skipped} 张，失败 {failed} 张")
+
+
+def build_atlases(jacket_cache, paths, window_sizes):
+    """按输出窗口大小打包曲绘图集，每种曲绘大小一个图集"""
+    os.makedirs(jacket_cache.disk_dir, exist_ok=True)
+    for window_size in window_sizes:
+        for size in jacket_sizes(tuple(int(value) for value in window_size.lower().split('x'))):
+            def items():
+                for path in paths:
+                    try:
+                        mtime_ns = os.stat(path).st_mtime_ns
+                        # 已经转码过的单张曲绘直接用，没有的解码后只写进图集
+                        jacket = jacket_cache._load_transcoded(path, size)
+                        if jacket is None:
+                            jacket = Image.open(path).convert('RGBA').resize(size, Image.Resampling.LANCZOS)
+                        yield jacket_name(path), mtime_ns, jacket
+                    except OSError as e:
+                        print(f"{path} 转码失败: {e}")
+            count = JacketAtlas.build(*jacket_cache.atlas_paths(size), size, items())
+            print(f"{window_size}: {size[0]}x{size[1]} 图集打包 {count} 张")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
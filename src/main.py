@@ -1,10 +1,13 @@
 from controller import Controller
 from gui_window import GUIWindow
 from display_window import DisplayWindow
-from utils import Utils
+from utils import Utils, preload_utils
 from size_selector import select_window_size
 
 def main():
+    # 在选择窗口大小的同时，后台加载曲库
+    preload_utils()
+
     # 显示窗口大小选择对话框
     window_size = select_window_size()
     
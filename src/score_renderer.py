@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from PIL import Image
+
+# result_num.dds里0-9的切图位置
+DIGIT_TOP = 2
+DIGIT_BOTTOM = 93
+DIGIT_LEFT = [
+    12, 112, 197, 293, 386, 480, 574, 668, 763, 857
+]
+DIGIT_RIGHT = [
+    82, 171, 270, 365, 459, 554, 646, 741, 834, 929
+]
+# 逗号的切图位置 (左, 上, 右, 下)
+COMMA_CROP = (951, 44, 997, 93)
+
+# 数字间距（1920x1080下），逗号左右两边分别是逗号前后的间距
+DIGIT_PITCH = 90
+COMMA_PITCH_RIGHT = 75
+COMMA_PITCH_LEFT = 65
+
+
+class ScoreRenderer:
+    """成绩数字渲染：0-9和逗号按大小各缩放一次，整个数字拼成一张图，按数值缓存
+
+    拼出来的图和逐个数字贴上去的位置完全一样：数字从右往左排，每个字以中心对齐，每三位加一个逗号
+    """
+
+    def __init__(self, sprite_cache, atlas_path, scale, max_items=64):
+        """
+        Args:
+            sprite_cache: 切图缓存，数字和逗号从这里裁剪缩放
+            atlas_path: result_num.dds的路径，需要已经预加载
+            scale: 缩放函数，参数为(值, 轴向)，即DisplayWindow._scale
+            max_items: 最多缓存的数字图数量
+        """
+        self.sprite_cache = sprite_cache
+        self.atlas_path = atlas_path
+        self.scale = scale
+        self.max_items = max_items
+        # 倍数 -> (0-9的切图, 逗号切图)
+        self.glyphs = {}
+        self.numbers = OrderedDict()
+
+    def _glyphs(self, time):
+        """当前分辨率下按倍数缩放好的数字和逗号"""
+        glyphs = self.glyphs.get(time)
+        if glyphs is None:
+            digit_height = self.scale(DIGIT_BOTTOM - DIGIT_TOP, 'y')
+            digits = [
+                self.sprite_cache.get(
+                    self.atlas_path,
+                    crop=(DIGIT_LEFT[digit], DIGIT_TOP, DIGIT_RIGHT[digit], DIGIT_BOTTOM),
+                    size=(int(self.scale(DIGIT_RIGHT[digit] - DIGIT_LEFT[digit], 'x') * time), int(digit_height * time))
+                )
+                for digit in range(10)
+            ]
+            comma_left, comma_top, comma_right, comma_bottom = COMMA_CROP
+            comma = self.sprite_cache.get(
+                self.atlas_path,
+                crop=COMMA_CROP,
+                size=(int(self.scale(comma_right - comma_left, 'x') * time), int(self.scale(comma_bottom - comma_top, 'y') * time))
+            )
+            glyphs = self.glyphs[time] = (digits, comma)
+        return glyphs
+
+    def render(self, value, start_x, digit_y, comma_y, time, pitch=1.0, bounds=None):
+        """拼出整个数字
+
+        Args:
+            value: 非负整数
+            start_x: 最右边一位数字的中心再往右一个间距的x
+            digit_y, comma_y: 数字和逗号中心的y
+            time: 数字和逗号的缩放倍数
+            pitch: 间距倍数
+            bounds: 要贴到的图片大小，和compose_image一样把每个字挪进图片范围内
+
+        Returns:
+            (图片, (x, y))，x, y为图片左上角在目标图片里的位置
+        """
+        key = (value, start_x, digit_y, comma_y, time, pitch, bounds)
+        number = self.numbers.get(key)
+        if number is not None:
+            self.numbers.move_to_end(key)
+            return number
+
+        digits, comma = self._glyphs(time)
+        # 先算出每个字的中心，和原来逐个贴图时一样
+        placed = []
+        position_x = start_x
+        text = str(value)
+        for index in range(len(text)):
+            if index % 3 == 0 and index != 0:
+                position_x -= self.scale(COMMA_PITCH_RIGHT * pitch, 'x')
+                placed.append((comma, position_x, comma_y))
+                position_x -= self.scale(COMMA_PITCH_LEFT * pitch, 'x')
+            else:
+                position_x -= self.scale(DIGIT_PITCH * pitch, 'x')
+            placed.append((digits[int(text[-index - 1])], position_x, digit_y))
+
+        # 中心对齐后的左上角
+        boxes = []
+        for glyph, x, y in placed:
+            x -= glyph.width // 2
+            y -= glyph.height // 2
+            if bounds:
+                x = max(0, min(x, bounds[0] - glyph.width))
+                y = max(0, min(y, bounds[1] - glyph.height))
+            boxes.append((glyph, x, y))
+        left = min(x for glyph, x, y in boxes)
+        top = min(y for glyph, x, y in boxes)
+        right = max(x + glyph.width for glyph, x, y in boxes)
+        bottom = max(y + glyph.height for glyph, x, y in boxes)
+        image = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        # 按原来的顺序从右往左叠上去
+        for glyph, x, y in boxes:
+            image.alpha_composite(glyph, (x - left, y - top))
+
+        number = (image, (left, top))
+        self.numbers[key] = number
+        while len(self.numbers) > self.max_items:
+            self.numbers.popitem(last=False)
+        return number
+
+    def overlay(self, value, start_x, digit_y, comma_y, time, pitch=1.0, bounds=None):
+        """返回compose_image用的覆盖图信息，参数见render"""
+        image, position = self.render(value, start_x, digit_y, comma_y, time, pitch, bounds)
+        return {
+            'image': image,
+            'position': position,
+            'anchor': 'lt'
+        }
+
+    def clear(self):
+        self.glyphs.clear()
+        self.numbers.clear()
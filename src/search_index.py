@@ -0,0 +1,84 @@
+class MusicSearchIndex:
+    """曲目搜索索引：预先转换小写，并建立字符n-gram倒排索引"""
+
+    def __init__(self, items, keys=None, names=None, n=2):
+        """
+        Args:
+            items: 可搜索字符串列表（"ID - 曲名"）
+            keys: 与items一一对应的曲目ID，用于排序（可选）
+            names: 与items一一对应的曲名，用于排序（可选）
+            n: n-gram长度
+        """
+        self.n = n
+        self.items = list(items)
+        # 和原来的搜索一样只做lower()，保证结果完全一致
+        self.lowered_items = [item.lower() for item in self.items]
+        self.lowered_keys = [str(key).lower() for key in keys] if keys is not None else None
+        self.lowered_names = [str(name).lower() for name in names] if names is not None else None
+        # gram -> 包含该gram的条目下标集合，长度1到n的gram都建索引
+        self.gram_index = {}
+        for index, text in enumerate(self.lowered_items):
+            for gram in self._grams(text):
+                self.gram_index.setdefault(gram, set()).add(index)
+
+    def _grams(self, text):
+        """字符串里所有长度为1到n的子串（去重）"""
+        grams = set()
+        for size in range(1, self.n + 1):
+            for start in range(len(text) - size + 1):
+                grams.add(text[start:start + size])
+        return grams
+
+    def _query_grams(self, query):
+        """查询字符串用来求交集的gram，短于n时直接用整个字符串"""
+        if len(query) <= self.n:
+            return {query}
+        return {query[start:start + self.n] for start in range(len(query) - self.n + 1)}
+
+    def search_indices(self, value):
+        """返回包含value（不区分大小写）的条目下标，按原列表顺序"""
+        if value == '':
+            return list(range(len(self.items)))
+        query = value.lower()
+
+        # 从最小的集合开始求交集
+        postings = []
+        for gram in self._query_grams(query):
+            posting = self.gram_index.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+
+        # n-gram都出现不代表连续出现，长查询需要再确认一次
+        if len(query) > self.n:
+            return sorted(index for index in candidates if query in self.lowered_items[index])
+        return sorted(candidates)
+
+    def search(self, value):
+        """返回包含value（不区分大小写）的条目，结果和逐条 value.lower() in item.lower() 一致"""
+        return [self.items[index] for index in self.search_indices(value)]
+
+    def _rank(self, index, query):
+        """相关度：0 ID完全一致，1 ID前缀，2 曲名前缀，3 其他包含"""
+        if self.lowered_keys is not None:
+            if self.lowered_keys[index] == query:
+                return 0
+            if self.lowered_keys[index].startswith(query):
+                return 1
+        if self.lowered_names is not None and self.lowered_names[index].startswith(query):
+            return 2
+        return 3
+
+    def search_ranked(self, value):
+        """返回包含value的条目，按相关度排序，相关度相同时保持原列表顺序"""
+        indices = self.search_indices(value)
+        if value != '':
+            query = value.lower()
+            indices.sort(key=lambda index: (self._rank(index, query), index))
+        return [self.items[index] for index in indices]
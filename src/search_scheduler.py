@@ -0,0 +1,79 @@
+import threading
+from queue import Queue
+import tkinter as tk
+
+
+class SearchScheduler:
+    """搜索调度器：按控件防抖，在工作线程里匹配，只把每个控件最新的结果交回Tk线程"""
+
+    def __init__(self, root, search_func, apply_func, delay=120):
+        """
+        Args:
+            root: Tk根窗口，用来调度after
+            search_func: 在工作线程里执行的匹配函数，参数为查询字符串
+            apply_func: 在Tk线程里执行的回调，参数为(控件, 结果, context)
+            delay: 防抖时间（毫秒）
+        """
+        self.root = root
+        self.search_func = search_func
+        self.apply_func = apply_func
+        self.delay = delay
+
+        # 控件 -> 还没触发的after编号
+        self.pending = {}
+        # 控件 -> 最新一次查询的编号，编号落后的查询直接丢弃
+        self.generations = {}
+        self.lock = threading.Lock()
+
+        self.tasks = Queue()
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+
+    def schedule(self, widget, value, context=None, immediate=False):
+        """安排一次搜索，新的按键会取消同一控件还没开始的搜索，并作废正在进行的搜索"""
+        after_id = self.pending.pop(widget, None)
+        if after_id:
+            self.root.after_cancel(after_id)
+
+        with self.lock:
+            generation = self.generations.get(widget, 0) + 1
+            self.generations[widget] = generation
+
+        if immediate:
+            self._submit(widget, value, generation, context)
+        else:
+            self.pending[widget] = self.root.after(self.delay, self._submit, widget, value, generation, context)
+
+    def _submit(self, widget, value, generation, context):
+        """防抖结束，把查询交给工作线程"""
+        self.pending.pop(widget, None)
+        self.tasks.put((widget, value, generation, context))
+
+    def _is_latest(self, widget, generation):
+        with self.lock:
+            return self.generations.get(widget) == generation
+
+    def _work(self):
+        """工作线程：执行匹配，过期的查询不算也不回传"""
+        while True:
+            widget, value, generation, context = self.tasks.get()
+            if not self._is_latest(widget, generation):
+                continue
+            try:
+                result = self.search_func(value)
+            except Exception as e:
+                print(f"搜索失败: {e}")
+                continue
+            if not self._is_latest(widget, generation):
+                continue
+            try:
+                self.root.after(0, self._deliver, widget, generation, result, context)
+            except (RuntimeError, tk.TclError):
+                # 窗口已经关闭
+                return
+
+    def _deliver(self, widget, generation, result, context):
+        """Tk线程：结果送达时再确认一次没有更新的按键"""
+        if not self._is_latest(widget, generation):
+            return
+        self.apply_func(widget, result, context)
@@ -0,0 +1,53 @@
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+
+class SpriteCache:
+    """图集切图缓存：按(路径, 裁剪区域, 目标大小, 透明度)缓存裁剪缩放好的RGBA图片，超出容量时淘汰最久没用的"""
+
+    def __init__(self, source_loader, max_items=256):
+        """
+        Args:
+            source_loader: 参数为路径，返回原始图集（PIL RGBA图像），只读不改
+            max_items: 最多缓存的切图数量
+        """
+        self.source_loader = source_loader
+        self.max_items = max_items
+        self.sprites = OrderedDict()
+        # 卡片在多个工作线程里合成，同时读写缓存
+        self.lock = threading.Lock()
+
+    def get(self, path, crop=None, size=None, alpha=1.0):
+        """返回可以直接粘贴的切图，调用方不能修改返回的图片"""
+        if crop is None and size is None and alpha >= 1.0:
+            return self.source_loader(path)
+        key = (path, tuple(crop) if crop else None, tuple(size) if size else None, alpha)
+        with self.lock:
+            sprite = self.sprites.get(key)
+            if sprite is not None:
+                self.sprites.move_to_end(key)
+                return sprite
+
+        # 在锁外处理，不同的切图可以同时缩放
+        sprite = self.source_loader(path)
+        # crop本身会生成新图像，不需要先复制整张图集
+        if crop:
+            sprite = sprite.crop(crop)
+        if size:
+            sprite = sprite.resize(size, Image.Resampling.LANCZOS)
+        if alpha < 1.0:
+            r, g, b, a = sprite.split()
+            a = a.point(lambda p: int(p * alpha))
+            sprite = Image.merge('RGBA', (r, g, b, a))
+
+        with self.lock:
+            self.sprites[key] = sprite
+            self.sprites.move_to_end(key)
+            while len(self.sprites) > self.max_items:
+                self.sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        with self.lock:
+            self.sprites.clear()
@@ -1,54 +1,294 @@
-import pandas as pd
 import os, sys
 import pathlib
+import pickle
+import json
+import hashlib
+import threading
+import math
+from bisect import bisect_left, bisect_right
 from enum import Enum
+from search_index import MusicSearchIndex
+
+# 曲库缓存格式版本，修改缓存结构时需要加一
+CATALOG_CACHE_VERSION = 1
+# 用户曲库存档格式版本
+USER_LIBRARY_VERSION = 1
+
+MUSIC_DATA_FILES = [
+    'assets/music_data/MusicData.xlsx',
+    'assets/music_data/MusicData_BPM_ND.xlsx',
+]
 
 def Singleton(cls):
     instances = {}
+    lock = threading.Lock() # 后台线程和主线程可能同时创建实例，后来的会等先来的创建完
     def getinstance(*args, **kwargs):
         if cls not in instances:
-            instances[cls] = cls(*args, **kwargs)
+            with lock:
+                if cls not in instances:
+                    instances[cls] = cls(*args, **kwargs)
         return instances[cls]
     return getinstance
 
+def preload_utils():
+    """在后台线程加载曲库并导入pandas，第一次用到Utils()时如果还没加载完才会等待"""
+    def load():
+        try:
+            Utils()
+            import pandas # 导入曲库时要用，提前导入
+        except Exception as e:
+            # 主线程第一次调用Utils()时会重新加载并报错
+            print(f"后台加载曲库失败: {e}")
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    return thread
+
 @Singleton
 class Utils:
     def __init__(self):
         self.base_path = self.get_base_path()
         self.music_list = self.import_music_list()
         self.searchable_music_list = [f"{key} - {info['Name']}" for key, info in self.music_list.items()]
+        self.search_index = MusicSearchIndex(
+            self.searchable_music_list,
+            keys=list(self.music_list.keys()),
+            names=[info['Name'] for info in self.music_list.values()]
+        )
+        # 导入曲库时用的索引：曲名 -> ID列表，ID -> 在全曲库里的位置
+        self.music_ids_by_name = {}
+        self.music_order = {}
+        for position, (key, info) in enumerate(self.music_list.items()):
+            self.music_ids_by_name.setdefault(str(info['Name']).strip(), []).append(key)
+            self.music_order[key] = position
+        # 按定数排序的索引，随机选曲时用二分查找定数范围
+        self.music_const_index = self.build_const_index(self.music_list)
+        self.users_const_index = {}
         self.users_music_list = {}
-        
+        # 用户曲库名 -> 导入时源文件的签名，源文件没变就不用重新导入
+        self.users_music_sources = {}
+        self.load_user_libraries()
+
     @staticmethod
     def get_base_path():
         if hasattr(sys, "_MEIPASS"):
             return sys._MEIPASS
         return pathlib.Path(__file__).parent.parent.resolve()
 
+    @staticmethod
+    def get_cache_dir():
+        """缓存目录，打包后放在exe旁边（_MEIPASS是每次启动都会变的临时目录）"""
+        if hasattr(sys, "_MEIPASS"):
+            return os.path.join(os.path.dirname(sys.executable), 'cache')
+        return os.path.join(pathlib.Path(__file__).parent.parent.resolve(), 'cache')
+
     def resource_path(self,relative_path):
         return os.path.join(self.base_path, relative_path)
 
+    def cache_path(self, relative_path):
+        return os.path.join(self.get_cache_dir(), relative_path)
+
     def import_music_list(self):
-        df = pd.read_excel(self.resource_path('assets/music_data/MusicData.xlsx'))
-        music_list = {}
+        """导入曲库，缓存有效时直接读取缓存，否则读取Excel并重建缓存"""
+        signature = self._music_data_signature()
+        # 其他按曲库生成的缓存（比如排版表）也用这个签名判断是否过期
+        self.music_data_signature = signature
+        music_list = self._load_music_list_cache(signature)
+        if music_list is None:
+            music_list = self._read_music_list_from_excel()
+            self._save_music_list_cache(signature, music_list)
+        # 缓存里存的是相对路径，换目录运行也能用
+        for music_infomation in music_list.values():
+            music_infomation['Jacket'] = self.resource_path(music_infomation['Jacket'])
+        return music_list
+
+    def _music_data_signature(self):
+        """曲库Excel文件的签名：(文件名, mtime, 大小, sha1)"""
+        signature = []
+        for relative_path in MUSIC_DATA_FILES:
+            path = self.resource_path(relative_path)
+            stat = os.stat(path)
+            with open(path, 'rb') as file:
+                digest = hashlib.sha1(file.read()).hexdigest()
+            signature.append((relative_path, stat.st_mtime_ns, stat.st_size, digest))
+        return signature
+
+    def _load_music_list_cache(self, signature):
+        """读取曲库缓存，缓存不存在、版本不对或Excel有改动时返回None"""
+        try:
+            with open(self.cache_path('music_list.pickle'), 'rb') as file:
+                cache = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get('version') != CATALOG_CACHE_VERSION:
+            return None
+        if cache.get('signature') != signature:
+            return None
+        return cache.get('music_list')
+
+    def _save_music_list_cache(self, signature, music_list):
+        """写入曲库缓存，写入失败不影响正常使用"""
+        cache = {
+            'version': CATALOG_CACHE_VERSION,
+            'signature': signature,
+            'music_list': music_list,
+        }
+        try:
+            os.makedirs(self.get_cache_dir(), exist_ok=True)
+            tmp_path = self.cache_path('music_list.pickle.tmp')
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(cache, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path('music_list.pickle'))
+        except OSError as e:
+            print(f"曲库缓存写入失败: {e}")
+
+    def _read_music_list_from_excel(self):
+        """从Excel读取曲库，Jacket为相对路径"""
+        import pandas as pd
+        df = pd.read_excel(
+            self.resource_path('assets/music_data/MusicData.xlsx'),
+            usecols=['ID', '曲名', '曲师', 'MASTER:大师']
+        )
+        df_bpm_nd = pd.read_excel(
+            self.resource_path('assets/music_data/MusicData_BPM_ND.xlsx'),
+            usecols=['ID', 'BPM', 'MASTER谱师']
+        )
+
+        # 按ID合并两张表，ID重复时和逐行写入一样以最后一行为准
+        df['ID'] = df['ID'].astype(str)
+        df_bpm_nd['ID'] = df_bpm_nd['ID'].astype(str)
+        df_bpm_nd = df_bpm_nd.drop_duplicates('ID', keep='last')
+        df = df.merge(df_bpm_nd, on='ID', how='left', indicator=True)
 
-        for index, row in df.iterrows():
+        jackets = 'assets/picture/jackets/CHU_UI_Jacket_' + df['ID'].str.zfill(4) + '.dds'
+        has_bpm_nd = (df['_merge'] == 'both').tolist()
+
+        # tolist()转出来的是Python原生类型，和原来iterrows的结果一致
+        music_list = {}
+        for music_id, name, composer, const, jacket, bpm, nd, matched in zip(
+            df['ID'].tolist(),
+            df['曲名'].tolist(),
+            df['曲师'].tolist(),
+            df['MASTER:大师'].tolist(),
+            jackets.tolist(),
+            df['BPM'].tolist(),
+            df['MASTER谱师'].tolist(),
+            has_bpm_nd
+        ):
             music_infomation = {
-                'Name': row['曲名'],
-                'Composer': row['曲师'],
-                'Const': row['MASTER:大师'],
-                'Jacket': self.resource_path(f'assets/picture/jackets/CHU_UI_Jacket_{str(row['ID']).zfill(4)}.dds')
+                'Name': name,
+                'Composer': composer,
+                'Const': const,
+                'Jacket': jacket
             }
-            music_list[str(row['ID'])] = music_infomation
+            # BPM表里没有的曲目不加BPM和ND，和原来保持一致
+            if matched:
+                music_infomation['BPM'] = bpm
+                music_infomation['ND'] = nd
+            music_list[music_id] = music_infomation
 
-        df = pd.read_excel(self.resource_path('assets/music_data/MusicData_BPM_ND.xlsx'))
+        return music_list
 
-        for index, row in df.iterrows():
-            if str(row['ID']) in music_list:
-                music_list[str(row['ID'])]['BPM'] = row['BPM']
-                music_list[str(row['ID'])]['ND'] = row['MASTER谱师']
+    def match_music_ids(self, contents, progress=None, progress_step=1000):
+        """按ID或完整曲名匹配曲目，返回去重后的ID列表，顺序和逐个比对全曲库时一样
 
-        return music_list
-    
-    def add_music_list(self, list_name, list_value):
-        self.users_music_list[list_name] = list_value
\ No newline at end of file
+        Args:
+            contents: 单元格或每行的内容
+            progress: 进度回调，参数为(已处理数量, 总数量)，每处理progress_step个调用一次
+        """
+        id_list = []
+        total = len(contents)
+        for done, content in enumerate(contents, 1):
+            if progress and done % progress_step == 0:
+                progress(done, total)
+            content = str(content).strip()
+            matches = self.music_ids_by_name.get(content, [])
+            if content in self.music_list and content not in matches:
+                # 同一内容匹配到多首时按全曲库顺序
+                matches = sorted(matches + [content], key=self.music_order.get)
+            id_list.extend(matches)
+        if progress:
+            progress(total, total)
+        return list(dict.fromkeys(id_list))
+
+    @staticmethod
+    def build_const_index(music_list):
+        """按定数排序的(定数列表, 曲目列表)，没有定数的曲目不参与随机"""
+        entries = []
+        for music in music_list.values():
+            const = music.get('Const')
+            if isinstance(const, (int, float)) and not math.isnan(const):
+                entries.append((const, music))
+        entries.sort(key=lambda entry: entry[0])
+        return [const for const, music in entries], [music for const, music in entries]
+
+    def get_const_range(self, list_name, min_const, max_const):
+        """用两次二分查找出定数在[min_const, max_const]内的曲目
+
+        Returns:
+            (按定数排序的曲目列表, 起始下标, 结束下标)，范围是musics[start:end]
+        """
+        if list_name in self.users_const_index:
+            consts, musics = self.users_const_index[list_name]
+        else:
+            consts, musics = self.music_const_index
+        return musics, bisect_left(consts, min_const), bisect_right(consts, max_const)
+
+    def add_music_list(self, list_name, list_value, source=None):
+        """添加用户曲库并保存到本地，source为导入时源文件的签名"""
+        self.users_music_list[list_name] = list_value
+        self.users_const_index[list_name] = self.build_const_index(list_value)
+        self.users_music_sources[list_name] = source
+        self.save_user_libraries()
+
+    @staticmethod
+    def get_file_signature(file_path):
+        """用户曲库源文件的签名：(绝对路径, mtime, 大小)"""
+        stat = os.stat(file_path)
+        return [os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size]
+
+    def is_music_list_up_to_date(self, list_name, file_path):
+        """同名曲库已经从这个文件导入过，并且文件没有改动"""
+        if list_name not in self.users_music_list:
+            return False
+        try:
+            return self.users_music_sources.get(list_name) == self.get_file_signature(file_path)
+        except OSError:
+            return False
+
+    def load_user_libraries(self):
+        """读取保存的用户曲库，只存了ID，按ID从全曲库取曲目"""
+        try:
+            with open(self.cache_path('user_libraries.json'), 'r', encoding='utf-8') as file:
+                store = json.load(file)
+        except (OSError, ValueError):
+            return
+        if not isinstance(store, dict) or store.get('version') != USER_LIBRARY_VERSION:
+            return
+        for list_name, library in store.get('libraries', {}).items():
+            # 全曲库更新后可能有曲目被删掉
+            list_value = {music_id: self.music_list[music_id] for music_id in library['ids'] if music_id in self.music_list}
+            if list_value:
+                self.users_music_list[list_name] = list_value
+                self.users_const_index[list_name] = self.build_const_index(list_value)
+                self.users_music_sources[list_name] = library.get('source')
+
+    def save_user_libraries(self):
+        """保存用户曲库（只存ID列表和源文件签名），写入失败不影响正常使用"""
+        store = {
+            'version': USER_LIBRARY_VERSION,
+            'libraries': {
+                list_name: {
+                    'ids': list(list_value.keys()),
+                    'source': self.users_music_sources.get(list_name)
+                }
+                for list_name, list_value in self.users_music_list.items()
+            }
+        }
+        try:
+            os.makedirs(self.get_cache_dir(), exist_ok=True)
+            tmp_path = self.cache_path('user_libraries.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(store, file, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path('user_libraries.json'))
+        except OSError as e:
+            print(f"用户曲库保存失败: {e}")